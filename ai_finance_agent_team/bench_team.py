@@ -0,0 +1,99 @@
+"""Vergleicht sequentielle und parallele Team-Ausführung mit simulierten Modellen und Tools.
+
+    python bench_team.py [--web-latency 0.6] [--finance-latency 0.5] [--timeout 3] [--json]
+
+Jedes Mitglied simuliert einen Modellaufruf (Tool-Wahl), einen Tool-Aufruf und
+einen zweiten Modellaufruf (Antwort). Der Tool-Aufruf blockiert wie yfinance oder
+DuckDuckGo. Es werden weder OpenAI noch das Netz benötigt.
+"""
+import json
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+from parallel_team import ParallelDispatcher
+
+
+class MockMember:
+    def __init__(self, name, model_latency, tool_latency):
+        self.name = name
+        self.model_latency = model_latency
+        self.tool_latency = tool_latency
+
+    def run(self, message):
+        time.sleep(self.model_latency)  # Modell wählt das Tool
+        time.sleep(self.tool_latency)   # Suche bzw. Kursabruf
+        time.sleep(self.model_latency)  # Modell formuliert die Antwort
+        return SimpleNamespace(content=f"{self.name}: Antwort auf '{message}'")
+
+    async def arun(self, message):
+        # Wie agno: Modellaufrufe sind async, synchrone Tools laufen direkt in der Event-Loop
+        await asyncio.sleep(self.model_latency)
+        time.sleep(self.tool_latency)
+        await asyncio.sleep(self.model_latency)
+        return SimpleNamespace(content=f"{self.name}: Antwort auf '{message}'")
+
+
+async def sequential(members, task):
+    # So delegiert der agno-Leader: ein Mitglied nach dem anderen
+    return [member.run(task).content for member in members]
+
+
+def measure(coroutine_factory, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(coroutine_factory())
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--web-latency", type=float, default=0.6, help="Sekunden je simuliertem Modellaufruf (Web)")
+    parser.add_argument("--web-tool", type=float, default=0.8, help="Sekunden für die simulierte Websuche")
+    parser.add_argument("--finance-latency", type=float, default=0.5, help="Sekunden je simuliertem Modellaufruf (Finance)")
+    parser.add_argument("--finance-tool", type=float, default=0.3, help="Sekunden für den simulierten Kursabruf")
+    parser.add_argument("--timeout", type=float, default=3.0, help="Timeout je Mitglied im Timeout-Szenario")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    members = [
+        MockMember("Web Agent", args.web_latency, args.web_tool),
+        MockMember("Finance Agent", args.finance_latency, args.finance_tool),
+    ]
+    task = "Wie steht NVDA und was gibt es Neues?"
+    dispatcher = ParallelDispatcher(members)
+    async_only = ParallelDispatcher(members, use_threads=False)
+
+    # Ein hängendes Mitglied darf die Antwort nicht blockieren
+    slow = MockMember("Slow Agent", 5.0, 0.0)
+    bounded = ParallelDispatcher(members + [slow], timeout=args.timeout)
+    timeout_results = []
+
+    async def with_timeout():
+        timeout_results[:] = await bounded.ask(task)
+
+    result = {
+        "sequential_s": measure(lambda: sequential(members, task), args.repeat),
+        "parallel_s": measure(lambda: dispatcher.ask(task), args.repeat),
+        "parallel_async_only_s": measure(lambda: async_only.ask(task), args.repeat),
+        "with_hanging_member_s": measure(with_timeout, 1),
+        "hanging_member_status": {r.name: r.status for r in timeout_results},
+    }
+    result["speedup"] = result["sequential_s"] / result["parallel_s"]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"sequentiell:           {result['sequential_s']:.2f} s")
+        print(f"parallel:              {result['parallel_s']:.2f} s  (x{result['speedup']:.2f})")
+        print(f"parallel, nur asyncio: {result['parallel_async_only_s']:.2f} s  (blockierende Tools)")
+        print(f"mit hängendem Mitglied: {result['with_hanging_member_s']:.2f} s  {result['hanging_member_status']}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,32 @@
+import os
+import argparse
+
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.storage.agent.sqlite import SqliteAgentStorage
 from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
 from agno.playground import Playground, serve_playground_app
 
+from parallel_team import ParallelDispatcher
+from storage import KEEP_RUNS, RETENTION_DAYS, compact_sessions, sqlite_storage
+from tool_cache import CachedYFinanceTools, ToolResultCache
+
+# Ein Cache für alle Sessions: gleiche Anfragen innerhalb der TTL gehen nur einmal an Yahoo.
+# Er liegt im Speicher des Prozesses: mit --workers N hat jeder Worker seinen eigenen
+yfinance_cache = ToolResultCache()
+
+# SQLite im WAL-Modus mit busy_timeout; pro Anfrage nur die letzten Läufe als Verlauf
+HISTORY_RUNS = 3
+web_storage = sqlite_storage("web_agent")
+finance_storage = sqlite_storage("finance_agent")
+
 web_agent = Agent(
     name="Web Agent",
     role="Search the web for information",
     model=OpenAIChat(id="gpt-4o"),
     tools=[DuckDuckGoTools()],
-    storage=SqliteAgentStorage(table_name="web_agent", db_file="agents.db"),
+    storage=web_storage,
     add_history_to_messages=True,
+    num_history_runs=HISTORY_RUNS,
     markdown=True,
 )
 
@@ -19,10 +34,11 @@ finance_agent = Agent(
     name="Finance Agent",
     role="Get financial data",
     model=OpenAIChat(id="gpt-4o"),
-    tools=[YFinanceTools(stock_price=True, analyst_recommendations=True, company_info=True, company_news=True)],
+    tools=[CachedYFinanceTools(cache=yfinance_cache, stock_price=True, analyst_recommendations=True, company_info=True, company_news=True)],
     instructions=["Always use tables to display data"],
-    storage=SqliteAgentStorage(table_name="finance_agent", db_file="agents.db"),
+    storage=finance_storage,
     add_history_to_messages=True,
+    num_history_runs=HISTORY_RUNS,
     markdown=True,
 )
 
@@ -34,7 +50,61 @@ agent_team = Agent(
     markdown=True,
 )
 
-app = Playground(agents=[agent_team]).get_app()
+# Gleiche Mitglieder, aber gleichzeitig statt nacheinander befragt (Timeout je Mitglied)
+dispatcher = ParallelDispatcher([web_agent, finance_agent], timeout=60, timeouts={"Web Agent": 45})
+
+parallel_team = Agent(
+    name="Agent Team (parallel)",
+    model=OpenAIChat(id="gpt-4o"),
+    tools=[dispatcher.as_tool()],
+    instructions=[
+        "Split the user request into independent sub-tasks, one per member, and call ask_team_members once with all of them.",
+        "Web Agent gets the news/web research part, Finance Agent the market data part; leave a member's task empty if it has nothing to do.",
+        "Merge the member answers into one response; mention members that timed out or failed.",
+    ],
+    show_tool_calls=True,
+    markdown=True,
+)
+
+app = Playground(agents=[agent_team, parallel_team]).get_app()
+
+
+@app.get("/metrics/yfinance")
+def yfinance_metrics():
+    """Zähler des yfinance-Caches dieses Worker-Prozesses (bei --workers > 1 nicht summiert)."""
+    return {"pid": os.getpid(), "scope": "worker", **yfinance_cache.stats()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prod", action="store_true", help="Mehrere Worker ohne Reload statt Entwicklungsserver")
+    # Ein Worker reicht meist, die Agents warten fast nur auf das LLM. Jeder weitere Worker hat einen
+    # eigenen yfinance-Cache samt Zusammenlegung, die Trefferquote sinkt etwa um den Faktor N
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker-Prozesse für --prod (jeder mit eigenem yfinance-Cache)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--keep-runs", type=int, default=KEEP_RUNS, help="Gespeicherte Läufe je Session")
+    parser.add_argument("--retention-days", type=float, default=RETENTION_DAYS,
+                        help="Sessions ohne Aktivität werden danach gelöscht")
+    parser.add_argument("--compact-only", action="store_true", help="Nur den Verlauf kürzen (z. B. per Cron)")
+    args = parser.parse_args(argv)
+
+    if args.prod or args.compact_only:
+        # Beide Tabellen liegen in derselben Datei
+        stats = compact_sessions(web_storage.db_engine, ("web_agent", "finance_agent"), keep_runs=args.keep_runs,
+                                 retention_days=args.retention_days)
+        print(f"Storage: {stats}")
+    if args.compact_only:
+        return
+
+    if args.prod:
+        import uvicorn
+
+        uvicorn.run("finance_agent_team:app", host=args.host, port=args.port, workers=args.workers,
+                    reload=False, proxy_headers=True, timeout_keep_alive=30)
+    else:
+        serve_playground_app("finance_agent_team:app", reload=True)
+
 
 if __name__ == "__main__":
-    serve_playground_app("finance_agent_team:app", reload=True)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import re
+import time
+import asyncio
+import inspect
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TIMEOUT = 60.0
+
+MemberResult = namedtuple("MemberResult", ["name", "status", "content", "seconds"])
+
+
+class ParallelDispatcher:
+    """Verteilt Teilaufgaben gleichzeitig an die Team-Mitglieder und führt die Antworten zusammen.
+
+    Der Team-Leader in agno ruft seine Mitglieder nacheinander auf; hier laufen
+    sie per asyncio parallel, jedes mit eigenem Timeout. Ein Mitglied, das zu
+    lange braucht oder fehlschlägt, blockiert die übrigen nicht: sein Abschnitt
+    wird als Timeout/Fehler markiert.
+
+    Mitglieder brauchen nur `name` und `run(message)` bzw. mit
+    `use_threads=False` eine async-Methode `arun(message)`; das Ergebnis hat
+    ein Attribut `content` (agno-Agents oder Mocks).
+    """
+
+    def __init__(self, members, timeout=DEFAULT_TIMEOUT, timeouts=None, use_threads=True):
+        self.members = list(members)
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.use_threads = use_threads
+        # Eigener Pool: nach einem Timeout läuft der Thread im Hintergrund aus,
+        # ohne dass asyncio.run() beim Beenden auf ihn wartet
+        self._executor = ThreadPoolExecutor(max_workers=4 * max(1, len(self.members)))
+
+    def _call(self, member, task):
+        if self.use_threads:
+            # agno ruft synchrone Tools (yfinance, DuckDuckGo) direkt in der Event-Loop auf;
+            # in eigenen Threads blockieren sie sich nicht gegenseitig
+            return asyncio.get_running_loop().run_in_executor(self._executor, member.run, task)
+        return member.arun(task)
+
+    async def _run_member(self, member, task):
+        timeout = self.timeouts.get(member.name, self.timeout)
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._call(member, task), timeout=timeout)
+        except asyncio.TimeoutError:
+            return MemberResult(member.name, "timeout", f"Keine Antwort innerhalb von {timeout:g} s.",
+                                time.perf_counter() - started)
+        except Exception as e:
+            return MemberResult(member.name, "error", f"{type(e).__name__}: {e}", time.perf_counter() - started)
+        content = getattr(response, "content", response)
+        return MemberResult(member.name, "ok", str(content or ""), time.perf_counter() - started)
+
+    async def dispatch(self, tasks):
+        """tasks: Mitgliedsname → Teilaufgabe. Ergebnisse in Reihenfolge der Mitglieder."""
+        members = [member for member in self.members if member.name in tasks]
+        return await asyncio.gather(*(self._run_member(member, tasks[member.name]) for member in members))
+
+    async def ask(self, task):
+        """Dieselbe Aufgabe an alle Mitglieder; jedes bearbeitet seinen Teil gemäß seiner Rolle."""
+        return await self.dispatch({member.name: task for member in self.members})
+
+    def run(self, task):
+        """Synchroner Einstieg (CLI, Benchmark)."""
+        return asyncio.run(self.ask(task))
+
+    @staticmethod
+    def merge(results):
+        """Fasst die Antworten der Mitglieder zu einem Markdown-Text zusammen."""
+        sections = []
+        for result in results:
+            status = "" if result.status == "ok" else f" ({result.status})"
+            sections.append(f"## {result.name}{status} – {result.seconds:.1f} s\n\n{result.content}")
+        return "\n\n".join(sections)
+
+    @staticmethod
+    def argument(name):
+        """Parametername des Tools für ein Mitglied: "Web Agent" → "web_agent_task"."""
+        return re.sub(r"\W+", "_", name.lower()).strip("_") + "_task"
+
+    def as_tool(self):
+        """Async-Tool für einen Leader-Agent: je Mitglied eine eigene Teilaufgabe, alle gleichzeitig bearbeitet.
+
+        Das Tool hat einen Parameter pro Mitglied (siehe argument()); leere
+        Teilaufgaben werden übersprungen, sodass der Leader nur die Mitglieder
+        fragt, die er braucht.
+        """
+        members = {self.argument(member.name): member for member in self.members}
+
+        async def ask_team_members(**tasks) -> str:
+            tasks = {members[arg].name: task for arg, task in tasks.items() if arg in members and task and task.strip()}
+            if not tasks:
+                return "No sub-task given: pass at least one of " + ", ".join(members) + "."
+            return self.merge(await self.dispatch(tasks))
+
+        # agno baut das Tool-Schema aus Signatur, Annotationen und Docstring
+        ask_team_members.__signature__ = inspect.Signature(
+            [inspect.Parameter(arg, inspect.Parameter.KEYWORD_ONLY, default="", annotation=str) for arg in members],
+            return_annotation=str,
+        )
+        ask_team_members.__annotations__ = {**{arg: str for arg in members}, "return": str}
+        args = "\n".join(
+            f"            {arg} (str): Self-contained sub-task for {member.name}"
+            f"{f' ({member.role})' if getattr(member, 'role', None) else ''}; leave empty to skip this member."
+            for arg, member in members.items()
+        )
+        ask_team_members.__doc__ = f"""
+        Use this function to split the user request into independent sub-tasks, one per team member.
+        The members work on their sub-tasks concurrently and their answers are returned together.
+        Give each member only the part that matches its role, with all details it needs.
+
+        Args:
+{args}
+
+        Returns:
+            str: The answers of the members as markdown sections.
+        """
+        return ask_team_members
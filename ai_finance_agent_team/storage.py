@@ -0,0 +1,98 @@
+import json
+import time
+
+from agno.storage.agent.sqlite import SqliteAgentStorage
+from sqlalchemy import event, inspect, text
+
+DB_FILE = "agents.db"
+BUSY_TIMEOUT_MS = 10_000
+# Aufbewahrung: gespeicherte Läufe je Session und Alter inaktiver Sessions
+KEEP_RUNS = 20
+KEEP_MESSAGES = 100
+RETENTION_DAYS = 30
+
+
+def tune_sqlite(engine, busy_timeout_ms=BUSY_TIMEOUT_MS):
+    """Stellt eine SQLite-Engine auf mehrere gleichzeitige Schreiber ein (WAL, busy_timeout)."""
+    @event.listens_for(engine, "connect")
+    def _configure(connection, _):
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+
+    # Bereits geöffnete Verbindungen (z. B. vom Schema-Inspector) ohne die Einstellungen verwerfen
+    engine.dispose()
+    return engine
+
+
+def sqlite_storage(table_name, db_file=DB_FILE, busy_timeout_ms=BUSY_TIMEOUT_MS):
+    # agno 1.x ignoriert ein übergebenes db_engine (legt dann eine In-Memory-DB an),
+    # daher wird die von agno erzeugte Engine nachträglich eingestellt
+    storage = SqliteAgentStorage(table_name=table_name, db_file=db_file)
+    tune_sqlite(storage.db_engine, busy_timeout_ms)
+    return storage
+
+
+def _stale_summary(memory):
+    # Frühere Kompaktierungen schrieben ein "summary" mit "questions" auf oberster Ebene;
+    # Memory v2 kennt den Schlüssel nicht (Memory(**memory) scheitert daran)
+    summary = memory.get("summary")
+    return isinstance(summary, dict) and "questions" in summary
+
+
+def compact_memory(memory, keep_runs=KEEP_RUNS, keep_messages=KEEP_MESSAGES):
+    """Kürzt den gespeicherten Verlauf einer Session.
+
+    Gibt (memory, entfernte Läufe, entfernte Nachrichten) zurück. Entfernte
+    Läufe werden nicht zusammengefasst: die Agents lesen ohnehin nur die
+    letzten num_history_runs Läufe.
+    """
+    if _stale_summary(memory):
+        del memory["summary"]
+    runs = memory.get("runs") or []
+    dropped = runs[:-keep_runs] if keep_runs else runs
+    if dropped:
+        memory["runs"] = runs[len(dropped):]
+    messages = memory.get("messages") or []
+    dropped_messages = max(0, len(messages) - keep_messages)
+    if dropped_messages:
+        memory["messages"] = messages[dropped_messages:]
+    return memory, len(dropped), dropped_messages
+
+
+def compact_sessions(engine, tables, keep_runs=KEEP_RUNS, keep_messages=KEEP_MESSAGES,
+                     retention_days=RETENTION_DAYS, vacuum=True):
+    """Löscht alte Sessions und kürzt den Verlauf der übrigen; gibt eine Statistik zurück."""
+    stats = {"deleted_sessions": 0, "compacted_sessions": 0, "dropped_runs": 0}
+    existing = set(inspect(engine).get_table_names())
+    cutoff = int(time.time() - retention_days * 86400)
+
+    with engine.begin() as connection:
+        for table in tables:
+            if table not in existing:
+                continue
+            deleted = connection.execute(
+                text(f"DELETE FROM {table} WHERE COALESCE(updated_at, created_at) < :cutoff"), {"cutoff": cutoff}
+            )
+            stats["deleted_sessions"] += deleted.rowcount
+            rows = connection.execute(text(f"SELECT session_id, memory FROM {table} WHERE memory IS NOT NULL"))
+            for session_id, raw in rows.fetchall():
+                memory = json.loads(raw) if isinstance(raw, str) else raw
+                stale = _stale_summary(memory)
+                memory, dropped, dropped_messages = compact_memory(memory, keep_runs, keep_messages)
+                if dropped or dropped_messages or stale:
+                    connection.execute(
+                        text(f"UPDATE {table} SET memory = :memory WHERE session_id = :session_id"),
+                        {"memory": json.dumps(memory), "session_id": session_id},
+                    )
+                    stats["compacted_sessions"] += 1
+                    stats["dropped_runs"] += dropped
+
+    if vacuum and (stats["deleted_sessions"] or stats["compacted_sessions"]):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+            # Im WAL-Modus landet VACUUM zunächst im WAL; erst der Checkpoint verkleinert die Datei
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return stats
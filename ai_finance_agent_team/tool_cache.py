@@ -0,0 +1,142 @@
+import time
+import functools
+import threading
+from collections import OrderedDict
+
+from agno.tools.yfinance import YFinanceTools
+
+# Gültigkeit je Datentyp in Sekunden: Kurse ändern sich laufend, Stammdaten kaum
+DEFAULT_TTLS = {
+    "get_current_stock_price": 15,
+    "get_historical_stock_prices": 300,
+    "get_technical_indicators": 300,
+    "get_company_news": 600,
+    "get_analyst_recommendations": 3600,
+    "get_company_info": 86400,
+    "get_stock_fundamentals": 86400,
+    "get_income_statements": 86400,
+    "get_key_financial_ratios": 86400,
+}
+DEFAULT_TTL = 60
+MAX_ENTRIES = 5000
+
+# So beginnen die Fehlermeldungen von YFinanceTools; diese werden nicht gecacht
+ERROR_PREFIXES = ("Error", "Could not")
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ToolResultCache:
+    """Thread-sicherer TTL-Cache für Tool-Ergebnisse mit Zusammenlegung paralleler Aufrufe.
+
+    Fragen mehrere Sessions gleichzeitig dieselben Daten an, führt nur der
+    erste Aufruf den Abruf aus; die anderen warten auf dessen Ergebnis.
+    Fehlermeldungen werden weitergereicht, aber nicht gespeichert.
+    """
+
+    def __init__(self, ttls=None, default_ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES, clock=time.monotonic):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _count(self, tool, name):
+        counters = self._metrics.setdefault(tool, {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0})
+        counters[name] += 1
+
+    def get(self, tool, key, fetch):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(tool, "hits")
+                return entry[1]
+            waiting = self._in_flight.get(key)
+            if waiting is None:
+                waiting = self._in_flight[key] = _InFlight()
+                self._count(tool, "misses")
+                owner = True
+            else:
+                self._count(tool, "coalesced")
+                owner = False
+
+        if not owner:
+            waiting.event.wait()
+            if waiting.error is not None:
+                raise waiting.error
+            return waiting.value
+
+        try:
+            value = fetch()
+        except Exception as e:
+            waiting.error = e
+            with self._lock:
+                self._count(tool, "errors")
+            raise
+        else:
+            waiting.value = value
+            failed = isinstance(value, str) and value.startswith(ERROR_PREFIXES)
+            with self._lock:
+                if failed:
+                    self._count(tool, "errors")
+                else:
+                    self._entries[key] = (self.clock() + self.ttls.get(tool, self.default_ttl), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            waiting.event.set()
+
+    def wrap(self, tool, function):
+        """Umhüllt eine Tool-Funktion; Signatur und Docstring bleiben für das Tool-Schema erhalten."""
+        @functools.wraps(function)
+        def cached(*args, **kwargs):
+            kwargs = {name: value.strip().upper() if name == "symbol" and isinstance(value, str) else value
+                      for name, value in kwargs.items()}
+            key = (tool, args, tuple(sorted(kwargs.items())))
+            return self.get(tool, key, lambda: function(*args, **kwargs))
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            tools = {tool: dict(counters) for tool, counters in self._metrics.items()}
+            entries = len(self._entries)
+        hits = sum(c["hits"] + c["coalesced"] for c in tools.values())
+        total = hits + sum(c["misses"] for c in tools.values())
+        return {"entries": entries, "hit_rate": round(hits / total, 3) if total else 0.0, "tools": tools}
+
+
+class CachedYFinanceTools(YFinanceTools):
+    """YFinanceTools, deren Funktionen über einen gemeinsamen ToolResultCache laufen.
+
+    `source` ersetzt die Datenquelle (ein Objekt mit denselben Methodennamen,
+    z. B. ein Stub ohne Netzwerkzugriff); ohne `source` wird Yahoo abgefragt.
+    """
+
+    def __init__(self, cache=None, source=None, **kwargs):
+        self.cache = cache if cache is not None else ToolResultCache()
+        self.source = source
+        super().__init__(**kwargs)
+
+    def register(self, function, name=None):
+        tool_name = name or function.__name__
+        target = getattr(self.source, function.__name__) if self.source is not None else function
+        fetch = functools.wraps(function)(lambda *args, **kwargs: target(*args, **kwargs))
+        return super().register(self.cache.wrap(tool_name, fetch), name=tool_name)
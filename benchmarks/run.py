@@ -0,0 +1,212 @@
+"""Misst alle Pipeline-Stufen offline gegen lokale Ersatzdienste (siehe stubs.py).
+
+    python benchmarks/run.py [--repeat 3] [--llm-latency 0.2] [--json] [--output result.json]
+    python benchmarks/run.py --compare baseline.json [--max-regression 1.2]
+
+Gemessen werden:
+- volantility: get_stock_data (Fixture-Downloader), compute_volatility, render_charts
+- summarizer: Website (Laden + Parsen), summarize_all, generate_risk_report
+- brochure_generator: get_all_details (Linkauswahl per LLM + Unterseiten)
+
+Seiten kommen aus benchmarks/fixtures über einen lokalen HTTP-Server, LLM-
+Antworten von einem Fake-Server mit einstellbarer Latenz, Kurse aus
+reproduzierbaren synthetischen Daten. Caches und Ausgaben landen in einem
+temporären Verzeichnis. Jede Stufe läuft `--repeat`-mal; der erste Lauf ist
+kalt (leere Caches), die weiteren warm.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.tracing import tracer
+from stubs import FakeLLMServer, PageServer, fixture_downloader, synthetic_prices
+
+
+def timed(function, repeat, quiet=True):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            started = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - started)
+    return {
+        "first_s": round(timings[0], 4),
+        "min_s": round(min(timings), 4),
+        "median_s": round(statistics.median(timings), 4),
+        "runs": len(timings),
+    }, result
+
+
+def bench_volantility(args, workdir, stages):
+    sys.path.insert(0, os.path.join(ROOT, "volantility"))
+    from fetch import get_stock_data
+    from render import render_charts
+    from volatility import compute_volatility
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    prices = synthetic_prices(tickers, days=args.days)
+    start, end = str(prices.index[0].date()), str(prices.index[-1].date())
+    downloader = fixture_downloader(prices, latency=args.download_latency)
+    charts = os.path.join(workdir, "charts")
+    os.makedirs(charts, exist_ok=True)
+
+    stages["volantility.get_stock_data"], df = timed(
+        lambda: get_stock_data(tickers, start, end, "1d", downloader=downloader), args.repeat, args.quiet)
+    stages["volantility.compute_volatility"], (price_df, volatility_df) = timed(
+        lambda: compute_volatility(df, tickers, "1d", args.estimator), args.repeat, args.quiet)
+    stages["volantility.render_charts"], _ = timed(
+        lambda: render_charts(price_df, volatility_df, charts, workers=args.workers), args.repeat, args.quiet)
+
+
+def bench_summarizer(args, workdir, pages, llm, stages):
+    sys.path.insert(0, os.path.join(ROOT, "summarizer"))
+    import summary
+    from common.llm import LLMClient, Provider
+    from keyfigures import KeyFigureStore
+    from weights import load_weights
+
+    # Wie configure(), aber ohne .env: der OpenAI-Provider zeigt auf den Fake-Server
+    summary.use_local = summary.use_openrouter = False
+    summary.llm_client = LLMClient(providers={
+        "openai": Provider("openai", llm.url, api_key="bench", rate=1000, max_concurrency=8),
+    })
+    summary.key_figure_store = KeyFigureStore(os.path.join(workdir, "key_figures.json"))
+    urls = [f"{pages.url}/finviz_quote.html?t=T{i:03d}" for i in range(args.pages - 1)]
+    urls.append(f"{pages.url}/onvista_kennzahlen.html")
+    overview = os.path.join(workdir, "overview.html")
+    risk = os.path.join(workdir, "risk_report.html")
+    weights_text = load_weights(os.path.join(ROOT, "summarizer", "weights.csv")).to_markdown(index=False)
+
+    stages["summarizer.website"], _ = timed(lambda: [summary.Website(url) for url in urls], args.repeat, args.quiet)
+    stages["summarizer.summarize_all"], results = timed(
+        lambda: summary.summarize_all(urls, workers=args.workers or summary.max_workers), args.repeat, args.quiet)
+    sections = [part for url, result in zip(urls, results) for part in summary.section_for(url, result)]
+    summary.write_html(overview, summary.html_page("Stock Overview Report", sections))
+    stages["summarizer.generate_risk_report"], _ = timed(
+        lambda: summary.generate_risk_report(weights_text, overview, risk), args.repeat, args.quiet)
+
+
+def bench_brochure(args, workdir, pages, llm, stages):
+    # Vor dem Import setzen: generate.py legt Client und Caches beim Laden an
+    os.environ["OPENAI_API_KEY"] = "sk-proj-benchmark"
+    os.environ["OPENAI_BASE_URL"] = llm.url
+    with contextlib.redirect_stdout(io.StringIO()):
+        sys.path.insert(0, os.path.join(ROOT, "brochure_generator"))
+        import generate
+    from openai import OpenAI
+    from common.http_cache import HTTPCache
+    from common.llm_cache import LLMCache
+
+    generate.openai = OpenAI(base_url=llm.url, api_key="sk-proj-benchmark")
+    generate.http_cache = HTTPCache(os.path.join(workdir, "http"), headers=generate.headers)
+    generate.llm_cache = LLMCache(os.path.join(workdir, "llm_cache.sqlite"))
+    landing = f"{pages.url}/company/index.html"
+    stages["brochure.get_all_details"], _ = timed(lambda: generate.get_all_details(landing), args.repeat, args.quiet)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(result, baseline, max_regression):
+    """Vergleicht die Median-Zeiten mit einem früheren Ergebnis; gibt die Regressionen zurück."""
+    regressions = []
+    print(f"\n{'Stufe':<36} {'vorher':>9} {'jetzt':>9} {'Faktor':>7}")
+    for stage, current in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before is None or not before["median_s"]:
+            print(f"{stage:<36} {'–':>9} {current['median_s']:>8.3f}s")
+            continue
+        ratio = current["median_s"] / before["median_s"]
+        flag = "  <-- langsamer" if ratio > max_regression else ""
+        print(f"{stage:<36} {before['median_s']:>8.3f}s {current['median_s']:>8.3f}s {ratio:>6.2f}x{flag}")
+        if ratio > max_regression:
+            regressions.append(stage)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline-Benchmarks für volantility, summarizer und brochure_generator.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=["volantility", "summarizer", "brochure"],
+                        default=["volantility", "summarizer", "brochure"])
+    parser.add_argument("--tickers", type=int, default=20, help="Ticker in den synthetischen Kursdaten")
+    parser.add_argument("--days", type=int, default=750, help="Handelstage je Ticker")
+    parser.add_argument("--estimator", default="close")
+    parser.add_argument("--download-latency", type=float, default=0.0, help="Sekunden je simuliertem Bulk-Download")
+    parser.add_argument("--pages", type=int, default=8, help="Seiten im summarizer-Lauf")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Antwortzeit des Seiten-Servers")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Zeit bis zur Antwort des Fake-LLM")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Abstand der gestreamten Wörter")
+    parser.add_argument("--workers", type=int, help="Threads/Prozesse (Standard: wie in den Skripten)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON-Datei speichern")
+    parser.add_argument("--compare", help="früheres JSON-Ergebnis zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=1.2,
+                        help="Faktor, ab dem eine Stufe beim Vergleich als Regression gilt (Exit-Code 1)")
+    parser.add_argument("--trace", metavar="DATEI", help="Spans der Skripte aufzeichnen (siehe common/tracing.py)")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="Ausgaben der Skripte anzeigen")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracer.enable(args.trace)
+
+    stages = {}
+    with tempfile.TemporaryDirectory(prefix="finance-bench-") as workdir, \
+            PageServer(latency=args.page_latency) as pages, \
+            FakeLLMServer(latency=args.llm_latency, token_latency=args.token_latency) as llm:
+        if "volantility" in args.only:
+            bench_volantility(args, workdir, stages)
+        if "summarizer" in args.only:
+            bench_summarizer(args, workdir, pages, llm, stages)
+        if "brochure" in args.only:
+            bench_brochure(args, workdir, pages, llm, stages)
+        requests_served = {"pages": pages.requests, "llm": llm.requests}
+
+    result = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "options": {key: value for key, value in vars(args).items() if key not in ("json", "output", "compare")},
+        "requests": requests_served,
+        "stages": stages,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'Stufe':<36} {'kalt':>9} {'min':>9} {'median':>9}")
+        for stage, timing in stages.items():
+            print(f"{stage:<36} {timing['first_s']:>8.3f}s {timing['min_s']:>8.3f}s {timing['median_s']:>8.3f}s")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        if regressions:
+            sys.exit(1)
+    return result
+
+
+if __name__ == "__main__":
+    main()
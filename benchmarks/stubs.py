@@ -0,0 +1,176 @@
+"""Lokale Ersatzdienste für die Benchmarks: Seiten-Server, LLM-Server und Kursdaten.
+
+Beide Server laufen in einem Hintergrund-Thread auf 127.0.0.1 (freier Port)
+mit einstellbarer Latenz, sodass die Pipelines ohne Netz und API-Keys laufen.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urljoin
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class _Server:
+    def __init__(self, handler):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _PageHandler(_Handler):
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count()
+        time.sleep(stub.latency)
+        path = os.path.normpath(os.path.join(stub.root, self.path.split("?", 1)[0].lstrip("/")))
+        if not path.startswith(stub.root) or not os.path.isfile(path):
+            return self.send(404, b"not found", "text/plain")
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send(200, body, "text/html; charset=utf-8", {"ETag": etag})
+
+
+class PageServer(_Server):
+    """Liefert die HTML-Fixtures aus `root` (mit ETag, wie ein echter Webserver).
+
+    Die Query wird ignoriert: /finviz_quote.html?t=AAPL und ?t=MSFT liefern dieselbe Seite.
+    """
+
+    def __init__(self, root=FIXTURES, latency=0.05):
+        self.root = os.path.abspath(root)
+        self.latency = latency
+        super().__init__(_PageHandler)
+
+
+class _LLMHandler(_Handler):
+    def do_POST(self):
+        stub = self.server.stub
+        stub.count()
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(stub.latency)
+        text = stub.answer(request)
+        ollama = self.path.endswith("/api/chat")
+        if not request.get("stream"):
+            if ollama:
+                payload = {"message": {"role": "assistant", "content": text}, "done": True}
+            else:
+                payload = {"choices": [{"message": {"role": "assistant", "content": text}}]}
+            return self.send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if ollama else "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in re.findall(r"\S+\s*", text):
+            time.sleep(stub.token_latency)
+            if ollama:
+                line = json.dumps({"message": {"content": word}, "done": False}) + "\n"
+            else:
+                line = "data: " + json.dumps({"choices": [{"delta": {"content": word}}]}) + "\n\n"
+            self.wfile.write(line.encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write((json.dumps({"done": True}) + "\n" if ollama else "data: [DONE]\n\n").encode("utf-8"))
+        self.close_connection = True
+
+
+class FakeLLMServer(_Server):
+    """OpenAI- (/chat/completions) und Ollama-kompatibler (/api/chat) Server.
+
+    Jede Antwort kommt nach `latency` Sekunden; gestreamt wird wortweise mit
+    `token_latency` Sekunden Abstand. Wird JSON verlangt (Linkauswahl im
+    brochure_generator), enthält die Antwort alle Links aus dem Prompt außer
+    Datenschutz und AGB.
+    """
+
+    def __init__(self, latency=0.2, token_latency=0.002, words=120):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.words = words
+        super().__init__(_LLMHandler)
+
+    def answer(self, request):
+        prompt = request["messages"][-1]["content"]
+        if request.get("response_format", {}).get("type") == "json_object":
+            base = re.search(r"website of (\S+) -", prompt)
+            links = prompt.split("Links (some might be relative links):\n", 1)[-1].splitlines()
+            return json.dumps({"links": [
+                {"type": f"{os.path.splitext(os.path.basename(link))[0]} page",
+                 "url": urljoin(base.group(1) if base else "", link)}
+                for link in links if link.endswith(".html") and not re.search(r"privacy|terms", link)
+            ]})
+        return "## Analyse\n\n" + " ".join(f"Punkt{i}" for i in range(self.words))
+
+
+def synthetic_prices(tickers, days=750, seed=42):
+    """Reproduzierbare OHLCV-Daten (Geometrische Brownsche Bewegung) im Format von yf.download."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2022-01-03", periods=days, name="Date")
+    frames = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+        open_ = close * (1 + rng.normal(0, 0.005, days))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, days)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, days)))
+        frames[ticker] = pd.DataFrame({
+            "Open": open_, "High": high, "Low": low, "Close": close, "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, days),
+        }, index=index)
+    return pd.concat(frames, axis=1)
+
+
+def fixture_downloader(prices, latency=0.0):
+    """Ersetzt fetch.yfinance_downloader: gleiche Signatur, Daten aus `prices`."""
+    def download(tickers, start, end, interval):
+        time.sleep(latency)
+        return prices.loc[str(start):str(end), [t for t in tickers if t in prices.columns.get_level_values(0)]]
+    return download
@@ -1,15 +1,25 @@
 import os
+import sys
+import time
 import requests
 import json
 import openai
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.markdown import Markdown as RichMarkdown
 from typing import List
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 from IPython.display import Markdown, display, update_display
 from openai import OpenAI
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.llm_cache import LLMCache
+from common.html_text import charset, extract
+from common.http_cache import HTTPCache
+from common.tokens import count_tokens
+from common.tracing import run_in_context, traced, tracer
+from packer import PromptPacker, rank_links
+
 load_dotenv(override=True)
 api_key = os.getenv('OPENAI_API_KEY')
 
@@ -19,33 +29,37 @@ else:
     print("There might be a problem with your API key? Please visit the troubleshooting notebook!")
     
 MODEL = 'gpt-4o-mini'
+PROMPT_BUDGET = 2_000  # Tokens für Seiteninhalte im Brochure-Prompt
+MAX_WORKERS = 4  # parallele Downloads von Unterseiten
 openai = OpenAI()
+llm_cache = LLMCache()
 
 # A class to represent a Webpage
 # Some websites need you to use proper headers when fetching them:
 headers = {
  "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
 }
+# Seiten werden auf Platte gecacht und per ETag/Last-Modified revalidiert
+http_cache = HTTPCache(headers=headers)
 
 class Website:
     """
     A utility class to represent a Website that we have scraped, now with links
     """
 
-    def __init__(self, url):
+    def __init__(self, url, content=None, content_type=None):
         self.url = url
-        response = requests.get(url, headers=headers)
-        self.body = response.content
-        soup = BeautifulSoup(self.body, 'html.parser')
-        self.title = soup.title.string if soup.title else "No title found"
-        if soup.body:
-            for irrelevant in soup.body(["script", "style", "img", "input"]):
-                irrelevant.decompose()
-            self.text = soup.body.get_text(separator="\n", strip=True)
-        else:
-            self.text = ""
-        links = [link.get('href') for link in soup.find_all('a')]
-        self.links = [link for link in links if link]
+        with tracer.span("website", url=url):
+            if content is None:
+                with tracer.span("website.fetch") as fetch:
+                    content, content_type = http_cache.fetch(url)
+                    fetch.set(bytes=len(content))
+            self.body = content
+            with tracer.span("website.parse"):
+                page = extract(self.body, encoding=charset(content_type))
+        self.title = page.title
+        self.text = page.text
+        self.links = page.links
 
     def get_contents(self):
         return f"Webpage Title:\n{self.title}\nWebpage Contents:\n{self.text}\n\n"
@@ -70,12 +84,13 @@ and creates a short brochure about the company for prospective customers, invest
 Include details of company culture, customers and careers/jobs if you have the information."
 
 
-def get_brochure_user_prompt(company_name, url):
-    user_prompt = f"You are looking at a company called: {company_name}\n"
-    user_prompt += f"Here are the contents of its landing page and other relevant pages; use this information to build a short brochure of the company in markdown.\n"
-    user_prompt += get_all_details(url)
-    user_prompt = user_prompt[:5_000] # Truncate if more than 5,000 characters
-    return user_prompt
+def get_brochure_user_prompt(company_name, url, budget=PROMPT_BUDGET):
+    packer = PromptPacker(budget, MODEL)
+    packer.add(f"You are looking at a company called: {company_name}\n")
+    packer.add(f"Here are the contents of its landing page and other relevant pages; use this information to build a short brochure of the company in markdown.\n")
+    get_all_details(url, packer)
+    print(f"Prompt: {packer.used}/{packer.budget} tokens")
+    return packer.text()
 
 
 def get_links_user_prompt(website):
@@ -87,49 +102,96 @@ Do not include Terms of Service, Privacy, email links.\n"
     return user_prompt
 
 
-def get_links(url):
-    website = Website(url)
-    response = openai.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": link_system_prompt},
-            {"role": "user", "content": get_links_user_prompt(website)}
-      ],
-        response_format={"type": "json_object"}
-    )
-    result = response.choices[0].message.content
+def get_links(website):
+    messages = [
+        {"role": "system", "content": link_system_prompt},
+        {"role": "user", "content": get_links_user_prompt(website)}
+    ]
+
+    def ask():
+        with tracer.span("llm.call", provider="openai", model=MODEL) as span:
+            response = openai.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                response_format={"type": "json_object"}
+            )
+            content = response.choices[0].message.content
+            if span.recording:
+                span.set(tokens_in=sum(count_tokens(m["content"], MODEL) for m in messages),
+                         tokens_out=count_tokens(content or "", MODEL))
+            return content
+
+    # Gleiche Linkliste -> gleiche Antwort, ohne erneuten API-Aufruf
+    result = llm_cache.cached("openai", MODEL, messages, ask, params={"response_format": "json_object"})
     return json.loads(result)
 
 
-def get_all_details(url):
-    result = "Landing page:\n"
-    result += Website(url).get_contents()
-    links = get_links(url)
+def fetch_page(link):
+    try:
+        return Website(link["url"])
+    except requests.RequestException as e:
+        print(f"Could not fetch {link['url']}: {e}")
+        return None
+
+
+@traced("get_all_details")
+def get_all_details(url, packer=None, max_workers=MAX_WORKERS):
+    """Lädt Landing Page und relevante Unterseiten in den Packer.
+
+    Die Landing Page wird nur einmal geladen und auch für die Linkauswahl
+    verwendet. Unterseiten werden nach Relevanz sortiert in Wellen von
+    `max_workers` parallel geladen und in Rangfolge eingefügt; sobald das
+    Token-Budget voll ist, startet keine weitere Welle.
+    """
+    packer = packer or PromptPacker(PROMPT_BUDGET, MODEL)
+    landing = Website(url)
+    packer.add_page("Landing page:", landing.title, landing.text)
+    links = get_links(landing)
     print("Found links:", links)
-    for link in links["links"]:
-        result += f"\n\n{link['type']}\n"
-        result += Website(link["url"]).get_contents()
-    return result
+    ranked = rank_links(links["links"])
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for start in range(0, len(ranked), max_workers):
+            if packer.full:
+                for link in ranked[start:]:
+                    print(f"Token budget reached, skipping {link['url']}")
+                break
+            wave = ranked[start:start + max_workers]
+            for link, website in zip(wave, pool.map(run_in_context(fetch_page), wave)):
+                if website is not None and not packer.full:
+                    packer.add_page(f"\n{link['type']}", website.title, website.text)
+    return packer.text()
 
 def stream_brochure(company_name, url):
-    stream = openai.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": get_brochure_user_prompt(company_name, url)}
-        ],
-        stream=True
-    )
-
-    response = ""
-    for chunk in stream:
-        delta = chunk.choices[0].delta.content
-        if delta:
-            response += delta
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": get_brochure_user_prompt(company_name, url)}
+    ]
+    with tracer.span("llm.stream", provider="openai", model=MODEL) as span:
+        started = time.perf_counter()
+        stream = openai.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            stream=True
+        )
+
+        response = ""
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not response and span.recording:
+                    span.set(ttft_s=time.perf_counter() - started)
+                response += delta
+        if span.recording:
+            span.set(tokens_in=sum(count_tokens(m["content"], MODEL) for m in messages),
+                     tokens_out=count_tokens(response, MODEL))
 
     # Ausgabe als Markdown im Terminal mit 'rich'
     markdown_output = RichMarkdown(response.replace("```", "").replace("markdown", ""))
     console.print(markdown_output)
+    print(f"LLM-Cache: {llm_cache.stats()}")
+    print(f"HTTP-Cache: {http_cache.stats()}")
 
 console = Console()
-stream_brochure("Heise", "https://heise.de/")           
\ No newline at end of file
+
+if __name__ == "__main__":
+    stream_brochure("Heise", "https://heise.de/")           
\ No newline at end of file
@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tokens import count_tokens, truncate_tokens
+
+# Begriffe, die auf brochure-relevante Inhalte hindeuten (Seitentyp und Abschnitte)
+LINK_PRIORITY = [
+    (3, ("about", "company", "unternehmen", "ueber", "über", "who-we-are", "mission")),
+    (2, ("career", "jobs", "karriere", "join", "team", "culture", "kultur")),
+    (1, ("customer", "kunden", "product", "produkt", "solution", "investor", "press", "news")),
+]
+SECTION_KEYWORDS = re.compile(
+    r"\b(about|mission|vision|values|culture|team|history|founded|employees|customers?|clients?|"
+    r"products?|services?|solutions?|careers?|jobs?|hiring|benefits|investors?|revenue|"
+    r"unternehmen|kunden|produkte?|karriere|mitarbeiter|gegründet|werte|kultur)\b",
+    re.IGNORECASE,
+)
+
+# Abschnittsgröße beim Zerlegen einer Seite (Wörter)
+SECTION_WORDS = 80
+
+
+def link_priority(link):
+    haystack = f"{link.get('type', '')} {link.get('url', '')}".lower()
+    for score, words in LINK_PRIORITY:
+        if any(word in haystack for word in words):
+            return score
+    return 0
+
+
+def rank_links(links):
+    """Sortiert die vom LLM gewählten Links nach Relevanz (stabil)."""
+    return sorted(links, key=link_priority, reverse=True)
+
+
+def split_sections(text, words=SECTION_WORDS):
+    """Fasst die Textzeilen einer Seite zu Abschnitten von etwa `words` Wörtern zusammen."""
+    sections, current, count = [], [], 0
+    for line in text.split("\n"):
+        current.append(line)
+        count += len(line.split())
+        if count >= words:
+            sections.append("\n".join(current))
+            current, count = [], 0
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def section_score(section):
+    lines = section.split("\n")
+    # Fließtext (lange Zeilen) ist wertvoller als Navigationseinträge
+    prose = sum(1 for line in lines if len(line.split()) >= 8) / max(1, len(lines))
+    return len(SECTION_KEYWORDS.findall(section)) + 2 * prose
+
+
+class PromptPacker:
+    """Baut einen Prompt bis zu einem festen Token-Budget auf.
+
+    Seiten werden in Abschnitte zerlegt; pro Seite kommen die relevantesten
+    Abschnitte in Originalreihenfolge hinein, bis der Anteil der Seite oder
+    das Gesamtbudget erschöpft ist. Ist das Budget voll, meldet `full` das,
+    damit keine weiteren Seiten mehr geladen werden.
+    """
+
+    def __init__(self, budget, model, page_share=0.4, min_useful=64):
+        self.budget = budget
+        self.model = model
+        self.page_share = page_share
+        self.min_useful = min_useful
+        self.parts = []
+        self.used = 0
+
+    @property
+    def remaining(self):
+        return self.budget - self.used
+
+    @property
+    def full(self):
+        return self.remaining < self.min_useful
+
+    def add(self, text, limit=None):
+        limit = self.remaining if limit is None else min(limit, self.remaining)
+        tokens = count_tokens(text, self.model)
+        if tokens > limit:
+            text = truncate_tokens(text, limit, self.model)
+            tokens = count_tokens(text, self.model)
+        if text:
+            self.parts.append(text)
+            self.used += tokens
+        return tokens
+
+    def add_page(self, heading, title, text):
+        """Fügt die relevantesten Abschnitte einer Seite hinzu; gibt die Tokenzahl zurück."""
+        share = max(self.min_useful, int(self.budget * self.page_share))
+        limit = min(share, self.remaining)
+        header = f"{heading}\nWebpage Title:\n{title}\nWebpage Contents:\n"
+        header_tokens = count_tokens(header, self.model)
+        if header_tokens >= limit:
+            return 0
+
+        sections = split_sections(text)
+        costs = [count_tokens(section, self.model) for section in sections]
+        ranked = sorted(range(len(sections)), key=lambda i: section_score(sections[i]), reverse=True)
+
+        chosen, used = set(), header_tokens
+        for i in ranked:
+            if used + costs[i] <= limit:
+                chosen.add(i)
+                used += costs[i]
+        if not chosen and sections:
+            # Kein Abschnitt passt komplett: den besten gekürzt übernehmen
+            best = ranked[0]
+            sections[best] = truncate_tokens(sections[best], limit - header_tokens, self.model)
+            chosen.add(best)
+
+        body = "\n".join(sections[i] for i in sorted(chosen))
+        return self.add(header + body + "\n\n", limit)
+
+    def text(self):
+        return "".join(self.parts)
@@ -0,0 +1 @@
+"""Gemeinsame Bausteine für summarizer, brochure_generator und openrouter."""
@@ -0,0 +1,74 @@
+"""Vergleicht die HTML-Extraktion (lxml vs. BeautifulSoup) auf gespeicherten Seiten.
+
+    python -m common.bench_html [--repeat 20] [dateien ...]
+
+Standardmäßig werden die HTML-Dateien aus summarizer/output_examples verwendet.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.html_text import BACKENDS, extract
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "summarizer", "output_examples", "*.html")
+
+
+def measure(content, backend, repeat):
+    extract(content, backend)  # Aufwärmen
+    started = time.perf_counter()
+    for _ in range(repeat):
+        extract(content, backend)
+    seconds = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    result = extract(content, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(glob.glob(EXAMPLES))
+    rows = []
+    for path in files:
+        with open(path, "rb") as f:
+            content = f.read()
+        row = {"file": os.path.basename(path), "bytes": len(content)}
+        texts = {}
+        for backend in BACKENDS:
+            seconds, peak, result = measure(content, backend, args.repeat)
+            row[f"{backend}_ms"] = seconds * 1000
+            row[f"{backend}_peak_kb"] = peak / 1024
+            texts[backend] = result.text
+        if "lxml" in texts:
+            row["speedup"] = row["bs4_ms"] / row["lxml_ms"] if row["lxml_ms"] else None
+            row["same_text"] = texts["lxml"] == texts["bs4"]
+        rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return rows
+
+    for row in rows:
+        line = f"{row['file']:<32} {row['bytes'] / 1024:8.1f} KB  bs4 {row['bs4_ms']:8.2f} ms {row['bs4_peak_kb']:9.0f} KB"
+        if "lxml_ms" in row:
+            line += (f"  lxml {row['lxml_ms']:7.2f} ms {row['lxml_peak_kb']:8.0f} KB"
+                     f"  x{row['speedup']:.1f}  same text: {row['same_text']}")
+        print(line)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import re
+import codecs
+from collections import namedtuple
+
+# Tags, deren Inhalt nicht im extrahierten Text landen soll
+SKIP_TAGS = ("script", "style", "noscript", "template", "img", "input")
+
+PageContent = namedtuple("PageContent", ["title", "text", "links"])
+
+BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+
+def charset(content_type):
+    """Zeichensatz aus einem Content-Type-Header ("text/html; charset=utf-8") oder None."""
+    match = HEADER_CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _known(encoding):
+    try:
+        return codecs.lookup(encoding).name if encoding else None
+    except LookupError:
+        return None
+
+
+def detect_encoding(content, declared=None):
+    """BOM, dann Zeichensatz aus dem HTTP-Header, dann <meta charset>; sonst UTF-8 bzw. Windows-1252.
+
+    Ohne Angabe würde lxml Bytes als Latin-1 lesen und UTF-8-Seiten verstümmeln ("MÃ¼ller").
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    meta = META_CHARSET.search(content[:4096])
+    for candidate in (declared, meta.group(1).decode("ascii") if meta else None):
+        encoding = _known(candidate)
+        if encoding:
+            return encoding
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def parse_html(content, encoding=None):
+    """lxml-Baum einer Seite; `content` als bytes (Zeichensatz wird erkannt) oder str."""
+    if isinstance(content, bytes):
+        parser = lxml.html.HTMLParser(encoding=detect_encoding(content, encoding))
+        return lxml.html.fromstring(content, parser=parser)
+    return lxml.html.fromstring(content)
+
+
+def element_text(element):
+    """Sichtbarer Text eines lxml-Elements, eine Zeile pro Textknoten (verändert das Element)."""
+    # Unerwünschte Elemente samt Inhalt entfernen, den nachfolgenden Text behalten
+    etree.strip_elements(element, etree.Comment, *SKIP_TAGS, with_tail=False)
+    lines = [chunk.strip() for chunk in element.itertext()]
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_lxml(content, encoding=None):
+    try:
+        root = parse_html(content, encoding)
+    except (etree.ParserError, ValueError):
+        return PageContent("No title found", "", [])
+
+    title = root.findtext(".//title")
+    links = [href for href in (a.get("href") for a in root.iter("a")) if href]
+
+    body = root.find("body")
+    if body is None:
+        body = root
+    text = element_text(body)
+    return PageContent(title if title is not None else "No title found", text, links)
+
+
+def _extract_bs4(content, encoding=None):
+    # Bisheriger Weg über BeautifulSoup (Fallback und Vergleich im Benchmark)
+    from bs4 import BeautifulSoup
+
+    if isinstance(content, bytes):
+        soup = BeautifulSoup(content, "html.parser", from_encoding=detect_encoding(content, encoding))
+    else:
+        soup = BeautifulSoup(content, "html.parser")
+    title = soup.title.string if soup.title and soup.title.string else "No title found"
+    links = [link.get("href") for link in soup.find_all("a")]
+    links = [link for link in links if link]
+    if soup.body:
+        for tag in soup.body(list(SKIP_TAGS)):
+            tag.decompose()
+        text = soup.body.get_text(separator="\n", strip=True)
+    else:
+        text = ""
+    return PageContent(title, text, links)
+
+
+BACKENDS = {"bs4": _extract_bs4}
+if HAVE_LXML:
+    BACKENDS["lxml"] = _extract_lxml
+
+DEFAULT_BACKEND = "lxml" if HAVE_LXML else "bs4"
+
+
+def extract(content, backend=None, encoding=None):
+    """Titel, sichtbaren Text (eine Zeile pro Textknoten) und Links einer Seite.
+
+    Mit lxml geschieht das in einem C-Parser-Durchlauf; ohne lxml wird
+    BeautifulSoup verwendet. `encoding` ist der Zeichensatz aus dem
+    Content-Type-Header (siehe charset()), falls bekannt.
+    """
+    return BACKENDS[backend or DEFAULT_BACKEND](content, encoding)
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "HTTP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "http"),
+)
+
+
+class HTTPCache:
+    """Platten-Cache für GET-Anfragen mit bedingten Requests.
+
+    Liegt eine Seite mit ETag/Last-Modified im Cache, wird mit If-None-Match
+    bzw. If-Modified-Since nachgefragt; bei 304 kommt der Inhalt von der
+    Platte. Solange Cache-Control: max-age gilt, entfällt die Anfrage ganz.
+    Jeder Thread nutzt eine eigene Keep-Alive-Session.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, headers=None, timeout=30, pool_size=8):
+        self.cache_dir = cache_dir
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.fresh = 0
+        self.not_modified = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _paths(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest[:2], digest)
+        return base + ".json", base + ".body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            # Für den Zeichensatz beim Parsen (die Datei enthält nur die rohen Bytes)
+            "content_type": response.headers.get("Content-Type"),
+            "max_age": _max_age(response.headers.get("Cache-Control", "")),
+            "fetched_at": time.time(),
+        }
+        _atomic_write(body_path, response.content)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, url):
+        """Liefert den Seiteninhalt (bytes), wenn möglich aus dem Cache."""
+        return self.fetch(url)[0]
+
+    def fetch(self, url):
+        """Wie get(), aber als (bytes, Content-Type); der Header kommt bei Treffern aus dem Cache."""
+        meta, body = self._load(url)
+        headers = {}
+        if meta is not None:
+            if meta.get("max_age") and time.time() - meta["fetched_at"] < meta["max_age"]:
+                self._count("fresh")
+                return body, meta.get("content_type")
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session().get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and body is not None:
+            self._count("not_modified")
+            meta["fetched_at"] = time.time()
+            _atomic_write(self._paths(url)[0], json.dumps(meta).encode("utf-8"))
+            return body, meta.get("content_type")
+
+        self._count("misses")
+        if response.ok and not _no_store(response.headers.get("Cache-Control", "")):
+            self._store(url, response)
+        return response.content, response.headers.get("Content-Type")
+
+    def stats(self):
+        return {"fresh": self.fresh, "not_modified": self.not_modified, "misses": self.misses}
+
+
+def _atomic_write(path, data):
+    # Parallele Threads dürfen keine halb geschriebenen Dateien sehen
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _max_age(cache_control):
+    if _no_store(cache_control) or "no-cache" in cache_control.lower():
+        return None
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else None
+
+
+def _no_store(cache_control):
+    return "no-store" in cache_control.lower()
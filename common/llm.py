@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.tracing import run_in_context, tracer
+
+# HTTP-Statuscodes, bei denen sich ein erneuter Versuch lohnt
+RETRY_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# (Verbindungsaufbau, Lesen) in Sekunden; Ollama generiert lokal und darf beliebig lange lesen
+DEFAULT_TIMEOUT = (10, 300)
+OLLAMA_TIMEOUT = (10, None)
+
+
+class LLMError(Exception):
+    pass
+
+
+class RetryableError(LLMError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Einfacher Token-Bucket: `rate` Anfragen pro Sekunde, Bursts bis `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+class Provider:
+    """Ein LLM-Endpunkt: OpenAI-kompatibel (OpenAI, OpenRouter) oder Ollama."""
+
+    def __init__(self, name, base_url, kind="openai", api_key=None, headers=None,
+                 rate=5.0, burst=None, max_concurrency=8, timeout=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.kind = kind
+        self.api_key = api_key
+        self.headers = dict(headers or {})
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout if timeout is not None else (OLLAMA_TIMEOUT if kind == "ollama" else DEFAULT_TIMEOUT)
+        self._local = threading.local()
+
+    def session(self):
+        # Eine Keep-Alive-Session pro Thread und Provider
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Content-Type": "application/json", **self.headers})
+            if self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self._local.session = session
+        return session
+
+    def _post(self, model, messages, params, stream):
+        if self.kind == "ollama":
+            url = f"{self.base_url}/api/chat"
+            payload = {"model": model, "messages": messages, "stream": stream}
+            if params:
+                payload["options"] = params
+        else:
+            url = f"{self.base_url}/chat/completions"
+            payload = {"model": model, "messages": messages, **params}
+            if stream:
+                payload["stream"] = True
+
+        response = self.session().post(url, data=json.dumps(payload), timeout=self.timeout, stream=stream)
+        if response.status_code in RETRY_STATUS:
+            retry_after = response.headers.get("Retry-After")
+            raise RetryableError(f"{self.name} {model}: HTTP {response.status_code} {response.text[:200]}",
+                                 retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        if response.status_code != 200:
+            raise LLMError(f"{self.name} {model}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def request(self, model, messages, params):
+        response = self._post(model, messages, params, stream=False)
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise LLMError(f"{self.name} {model}: invalid JSON ({e})")
+        return self.parse(model, data)
+
+    def stream_request(self, model, messages, params):
+        """Liefert die Antwort stückweise (SSE bei OpenAI/OpenRouter, NDJSON bei Ollama)."""
+        response = self._post(model, messages, params, stream=True)
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                line = line.decode("utf-8")
+                if self.kind == "ollama":
+                    data = json.loads(line)
+                else:
+                    # SSE: Kommentare (": OPENROUTER PROCESSING") überspringen
+                    if not line.startswith("data:"):
+                        continue
+                    line = line[5:].strip()
+                    if line == "[DONE]":
+                        break
+                    data = json.loads(line)
+                if "error" in data:
+                    self.parse(model, data)
+                if self.kind == "ollama":
+                    delta = (data.get("message") or {}).get("content")
+                else:
+                    choices = data.get("choices") or []
+                    delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    yield delta
+                if self.kind == "ollama" and data.get("done"):
+                    break
+        finally:
+            response.close()
+
+    def parse(self, model, data):
+        if "error" in data:
+            message = str(data["error"].get("message", data["error"]) if isinstance(data["error"], dict) else data["error"])
+            if "overloaded" in message.lower() or "rate limit" in message.lower():
+                raise RetryableError(f"{self.name} {model}: {message}")
+            raise LLMError(f"{self.name} {model}: {message}")
+        if self.kind == "ollama":
+            content = (data.get("message") or {}).get("content")
+        else:
+            choices = data.get("choices") or []
+            content = choices[0].get("message", {}).get("content") if choices else None
+        if content is None:
+            raise LLMError(f"{self.name} {model}: unexpected response format: {str(data)[:200]}")
+        return content
+
+
+def default_providers():
+    """Provider aus den Umgebungsvariablen (nach load_dotenv aufrufen)."""
+    return {
+        "openai": Provider(
+            "openai", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+            api_key=os.getenv("OPENAI_API_KEY"), rate=5, burst=10, max_concurrency=8,
+        ),
+        "openrouter": Provider(
+            "openrouter", os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+            api_key=os.getenv("OPENROUTER_API_KEY"), rate=5, burst=10, max_concurrency=8,
+            headers={"HTTP-Referer": "https://deinprojekt.de", "X-Title": "FinanzanalyseTool"},
+        ),
+        "ollama": Provider(
+            "ollama", os.getenv("OLLAMA_HOST", "http://localhost:11434"), kind="ollama",
+            rate=100, max_concurrency=1,
+        ),
+    }
+
+
+def _retryable(error):
+    """Nur Fehler, bei denen die Anfrage sicher nicht verarbeitet wurde: 429/5xx und Verbindungsaufbau.
+
+    Ein Lese-Timeout heißt, dass das Modell bereits generiert; ein erneutes
+    Senden würde die (nicht idempotente) Generierung verdoppeln und sich bei
+    Ollama hinter die abgebrochene Anfrage einreihen.
+    """
+    # ConnectTimeout ist eine Unterklasse von ConnectionError, ReadTimeout nicht
+    return isinstance(error, (RetryableError, requests.ConnectionError))
+
+
+class LLMClient:
+    """Gemeinsamer Client für alle Provider.
+
+    - Rate-Limit pro Provider (Token-Bucket) und begrenzte Parallelität
+    - Wiederholung mit exponentiellem Backoff und Jitter bei 429/5xx/"Overloaded"
+    - Fallback über mehrere Modelle, optional gehedgt: dauert das primäre
+      Modell länger als `hedge_after` Sekunden, läuft das nächste parallel an
+    - optionaler LLMCache davor
+    """
+
+    def __init__(self, providers=None, cache=None, max_retries=4, backoff_base=1.0,
+                 backoff_max=30.0, hedge_workers=16):
+        self.providers = providers if providers is not None else default_providers()
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._hedge_pool = ThreadPoolExecutor(max_workers=hedge_workers)
+
+    def provider(self, name):
+        try:
+            return self.providers[name]
+        except KeyError:
+            raise LLMError(f"Unknown provider: {name}")
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # "Full jitter": zufällig zwischen 0 und dem exponentiellen Deckel
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _call(self, provider_name, model, messages, params, retries=None):
+        retries = self.max_retries if retries is None else retries
+        provider = self.provider(provider_name)
+        with tracer.span("llm.call", provider=provider_name, model=model) as span:
+            if span.recording:
+                span.set(tokens_in=_message_tokens(messages), queue_s=0.0)
+            for attempt in range(retries + 1):
+                queued = time.perf_counter()
+                provider.bucket.acquire()
+                try:
+                    with provider.slots:
+                        if span.recording:
+                            # Wartezeit auf Rate-Limit und freien Slot, ohne Backoff
+                            span.set(queue_s=span.attributes["queue_s"] + time.perf_counter() - queued,
+                                     attempts=attempt + 1)
+                        result = provider.request(model, messages, params)
+                    if span.recording:
+                        span.set(tokens_out=_tokens(result))
+                    return result
+                except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+                    if not _retryable(e):
+                        raise LLMError(f"{provider_name} {model}: {e}")
+                    tracer.count("llm.retries")
+                    if attempt == retries:
+                        raise LLMError(f"{provider_name} {model}: giving up after {attempt + 1} attempts: {e}")
+                    time.sleep(self.backoff(attempt, getattr(e, "retry_after", None)))
+
+    def complete(self, provider, model, messages, **params):
+        """Eine Chat-Completion; `messages` im OpenAI-Format."""
+        if self.cache is None:
+            return self._call(provider, model, messages, params)
+        return self.cache.cached(provider, model, messages,
+                                 lambda: self._call(provider, model, messages, params), params=params)
+
+    def complete_once(self, provider, model, messages, **params):
+        """Wie complete(), aber genau ein Versuch ohne Wiederholung und ohne Cache.
+
+        Für Aufrufer, die selbst auf ein anderes Modell ausweichen (z. B. ein Router).
+        """
+        return self._call(provider, model, messages, params, retries=0)
+
+    def stream(self, provider_name, model, messages, **params):
+        """Wie complete(), liefert aber die Antwort als Folge von Text-Stücken.
+
+        Wiederholt wird nur, solange noch kein Token angekommen ist. Ein
+        Cache-Treffer kommt als ein einziges Stück.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(provider_name, model, messages, params)
+            if cached is not None:
+                tracer.count("llm.cache_hits")
+                yield cached
+                return
+
+        provider = self.provider(provider_name)
+        parts = []
+        # Kein Kontextmanager: der Generator kann in einem anderen Kontext fortgesetzt werden
+        span = tracer.start("llm.stream", provider=provider_name, model=model)
+        if span.recording:
+            span.set(tokens_in=_message_tokens(messages), queue_s=0.0)
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                queued = time.perf_counter()
+                provider.bucket.acquire()
+                try:
+                    with provider.slots:
+                        if span.recording:
+                            span.set(queue_s=span.attributes["queue_s"] + time.perf_counter() - queued,
+                                     attempts=attempt + 1)
+                        for delta in provider.stream_request(model, messages, params):
+                            if not parts and span.recording:
+                                span.set(ttft_s=time.perf_counter() - started)
+                            parts.append(delta)
+                            yield delta
+                    break
+                except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+                    if not _retryable(e):
+                        raise LLMError(f"{provider_name} {model}: {e}")
+                    tracer.count("llm.retries")
+                    if parts:
+                        raise LLMError(f"{provider_name} {model}: stream interrupted: {e}")
+                    if attempt == self.max_retries:
+                        raise LLMError(f"{provider_name} {model}: giving up after {attempt + 1} attempts: {e}")
+                    time.sleep(self.backoff(attempt, getattr(e, "retry_after", None)))
+        except BaseException as e:
+            span.end(None if isinstance(e, GeneratorExit) else e)
+            raise
+        if span.recording:
+            span.set(tokens_out=_tokens("".join(parts)))
+        span.end()
+
+        # Nur vollständige Antworten mit Inhalt cachen; ein leerer Stream würde sonst bei jedem Lauf wiederholt
+        text = "".join(parts)
+        if self.cache is not None and text.strip():
+            self.cache.set(provider_name, model, messages, text, params)
+
+    def stream_with_fallback(self, candidates, messages, **params):
+        """Streamt vom ersten Kandidaten, der antwortet; gewechselt wird nur vor dem ersten Token."""
+        errors = []
+        for provider, model in candidates:
+            started = False
+            try:
+                for delta in self.stream(provider, model, messages, **params):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                errors.append(str(e))
+        raise LLMError("All models failed: " + " | ".join(errors))
+
+    def complete_with_fallback(self, candidates, messages, hedge_after=None, **params):
+        """Probiert (provider, model)-Paare der Reihe nach.
+
+        Ohne `hedge_after` streng nacheinander; mit `hedge_after` startet der
+        nächste Kandidat, sobald der laufende zu lange braucht oder scheitert.
+        Gibt (provider, model, Antwort) des ersten erfolgreichen Kandidaten zurück.
+        """
+        candidates = list(candidates)
+        if not candidates:
+            raise LLMError("No candidates given")
+
+        if hedge_after is None:
+            errors = []
+            for provider, model in candidates:
+                try:
+                    return provider, model, self.complete(provider, model, messages, **params)
+                except Exception as e:
+                    errors.append(str(e))
+            raise LLMError("All models failed: " + " | ".join(errors))
+
+        pending = {}
+        errors = []
+        remaining = iter(candidates)
+
+        def launch():
+            candidate = next(remaining, None)
+            if candidate is not None:
+                future = self._hedge_pool.submit(run_in_context(self.complete), *candidate, messages, **params)
+                pending[future] = candidate
+            return candidate is not None
+
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primäres Modell zu langsam: nächsten Kandidaten parallel starten
+                launch()
+                continue
+            for future in done:
+                provider, model = pending.pop(future)
+                try:
+                    return provider, model, future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    launch()
+        raise LLMError("All models failed: " + " | ".join(errors))
+
+
+def _tokens(text):
+    # Erst beim Tracing laden (tiktoken)
+    from common.tokens import count_tokens
+    return count_tokens(text)
+
+
+def _message_tokens(messages):
+    return sum(_tokens(str(message.get("content") or "")) for message in messages)
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Standardwerte für den LLM-Antwort-Cache
+DEFAULT_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_cache.sqlite"),
+)
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _without(content, ignore):
+    if not isinstance(content, str):
+        return content
+    for pattern in ignore:
+        content = pattern.sub("", content)
+    return content
+
+
+def cache_key(provider, model, messages, params=None, ignore=()):
+    """SHA-256 über (Provider, Modell, Nachrichten, Parameter).
+
+    Treffer der regulären Ausdrücke in `ignore` (z. B. das Tagesdatum im Prompt)
+    werden vor dem Hashen aus den Nachrichten entfernt.
+    """
+    if ignore:
+        messages = [{**m, "content": _without(m.get("content"), ignore)} for m in messages]
+    payload = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "params": params or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-Cache für LLM-Antworten mit TTL und größenbegrenzter LRU-Verdrängung.
+
+    Gespeichert werden nur erfolgreiche Antworten: Wirft der Aufruf in
+    `cached()` eine Exception, wird nichts abgelegt. `ignore` nimmt Teile der
+    Nachrichten aus dem Schlüssel (siehe cache_key); wie lange eine so
+    geteilte Antwort gilt, bestimmt `ttl`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, enabled=True,
+                 ignore=()):
+        self.path = path
+        self.ignore = tuple(ignore)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT,"
+                " created REAL, last_access REAL, size INTEGER)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+
+    def get(self, provider, model, messages, params=None):
+        if not self.enabled:
+            return None
+        key = cache_key(provider, model, messages, params, self.ignore)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, provider, model, messages, response, params=None):
+        # Leere Antworten (None oder "") werden nicht gecacht
+        if not self.enabled or not response:
+            return
+        key = cache_key(provider, model, messages, params, self.ignore)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, now, now, len(response.encode("utf-8"))),
+            )
+            self._evict()
+
+    def cached(self, provider, model, messages, call, params=None):
+        """Liefert die gecachte Antwort oder ruft `call()` auf und speichert das Ergebnis."""
+        response = self.get(provider, model, messages, params)
+        if response is None:
+            response = call()
+            self.set(provider, model, messages, response, params)
+        return response
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+        if self.enabled:
+            with self._lock:
+                entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            stats.update(entries=entries, bytes=size)
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
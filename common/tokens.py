@@ -0,0 +1,46 @@
+import functools
+
+# Ohne tiktoken: grobe Schätzung über die Zeichenzahl
+CHARS_PER_TOKEN = 4
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    """tiktoken-Encoding für `model` oder None (nicht installiert / BPE-Datei nicht ladbar)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, model="gpt-4o-mini"):
+    """Kürzt `text` auf höchstens `max_tokens` Tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,273 @@
+"""Leichtgewichtiges Tracing: Spans und Zähler, Export als JSON oder OTLP/JSON.
+
+Aktiviert wird über die Umgebungsvariable FINANCE_TRACE=<datei> oder
+`tracer.enable(datei)` (Option --trace der Skripte). Beim Beenden des
+Prozesses werden die Spans exportiert und eine Übersicht ausgegeben; endet
+der Dateiname auf .otlp.json, im OpenTelemetry-Format (OTLP/JSON), das sich
+z. B. mit dem OTel-Collector oder Jaeger einlesen lässt.
+
+Ohne Aktivierung liefert `span()` ein gemeinsames No-op-Objekt: kein
+Zeitstempel, keine Allokation, kein Lock.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import random
+import threading
+import contextvars
+
+MAX_SPANS = 100_000
+# Attribute, die in der Übersicht summiert bzw. gemittelt werden
+SUMMED = ("bytes", "tokens_in", "tokens_out")
+AVERAGED = ("queue_s", "ttft_s")
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error=None):
+        pass
+
+
+NOOP = _NoopSpan()
+
+
+class Span:
+    recording = True
+
+    def __init__(self, tracer, name, parent, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.seconds = None
+        self.error = None
+        self.thread = threading.current_thread().name
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        if self.seconds is not None:
+            return
+        self.seconds = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer._finish(self)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+    def as_dict(self):
+        return {
+            "name": self.name, "span_id": self.span_id, "parent_id": self.parent_id,
+            "start_ns": self.start_ns, "seconds": round(self.seconds, 6), "thread": self.thread,
+            "error": self.error, "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    def __init__(self, enabled=False, path=None, max_spans=MAX_SPANS):
+        self.enabled = enabled
+        self.path = path
+        self.max_spans = max_spans
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans = []
+        self.dropped = 0
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def enable(self, path=None):
+        """Schaltet das Tracing ein; mit `path` wird beim Beenden exportiert und zusammengefasst."""
+        self.enabled = True
+        self.path = path or self.path
+        if self.path and not self._registered:
+            atexit.register(self.finish)
+            self._registered = True
+
+    def span(self, name, **attributes):
+        """Kontextmanager; verschachtelte Spans im selben Thread werden Kinder."""
+        if not self.enabled:
+            return NOOP
+        return Span(self, name, _current.get(), attributes)
+
+    def start(self, name, **attributes):
+        """Span ohne Kontextwechsel (z. B. in Generatoren); muss mit end() beendet werden."""
+        if not self.enabled:
+            return NOOP
+        return Span(self, name, _current.get(), attributes)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _finish(self, span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    # --- Auswertung und Export ---------------------------------------------
+
+    def summary(self):
+        """Je Span-Name: Anzahl, Gesamt-/Mittel-/p95-/Maximalzeit, Fehler und Attributsummen."""
+        with self._lock:
+            spans = list(self.spans)
+        groups = {}
+        for span in spans:
+            groups.setdefault(span.name, []).append(span)
+        rows = []
+        for name, group in groups.items():
+            timings = sorted(span.seconds for span in group)
+            row = {
+                "name": name, "count": len(group), "total_s": sum(timings),
+                "mean_ms": 1000 * sum(timings) / len(timings),
+                "p95_ms": 1000 * timings[min(len(timings) - 1, int(0.95 * len(timings)))],
+                "max_ms": 1000 * timings[-1],
+                "errors": sum(1 for span in group if span.error),
+            }
+            for key in SUMMED:
+                values = [span.attributes[key] for span in group if isinstance(span.attributes.get(key), (int, float))]
+                if values:
+                    row[key] = sum(values)
+            for key in AVERAGED:
+                values = [span.attributes[key] for span in group if isinstance(span.attributes.get(key), (int, float))]
+                if values:
+                    row[f"mean_{key}"] = sum(values) / len(values)
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def format_summary(self):
+        lines = [f"{'Span':<24} {'n':>5} {'gesamt':>9} {'mittel':>9} {'p95':>9} {'max':>9} {'Fehler':>6}  Details"]
+        for row in self.summary():
+            details = [f"{key}={row[key]}" for key in SUMMED if key in row]
+            details += [f"{key}={row[key] * 1000:.0f}ms" for key in (f"mean_{k}" for k in AVERAGED) if key in row]
+            lines.append(
+                f"{row['name']:<24} {row['count']:>5} {row['total_s']:>8.2f}s {row['mean_ms']:>7.0f}ms "
+                f"{row['p95_ms']:>7.0f}ms {row['max_ms']:>7.0f}ms {row['errors']:>6}  {' '.join(details)}"
+            )
+        if self.counters:
+            lines.append("Zähler: " + ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items())))
+        if self.dropped:
+            lines.append(f"{self.dropped} Spans verworfen (max_spans={self.max_spans})")
+        return "\n".join(lines)
+
+    def to_json(self):
+        with self._lock:
+            spans = [span.as_dict() for span in self.spans]
+            counters = dict(self.counters)
+        return {"trace_id": self.trace_id, "spans": spans, "counters": counters, "dropped": self.dropped}
+
+    def to_otlp(self, service_name="finance"):
+        """ExportTraceServiceRequest als JSON; Zähler landen als Ressourcen-Attribute."""
+        with self._lock:
+            spans = list(self.spans)
+            counters = {f"counter.{name}": value for name, value in self.counters.items()}
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": service_name, **counters})},
+                "scopeSpans": [{
+                    "scope": {"name": "common.tracing"},
+                    "spans": [{
+                        "traceId": self.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.start_ns + int(span.seconds * 1e9)),
+                        "attributes": _otlp_attributes({**span.attributes, "thread.name": span.thread}),
+                        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                    } for span in spans],
+                }],
+            }],
+        }
+
+    def export(self, path):
+        data = self.to_otlp() if path.endswith(".otlp.json") else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+
+    def finish(self):
+        """Exportiert nach `path` und gibt die Übersicht aus (läuft beim Beenden automatisch)."""
+        if not self.spans and not self.counters:
+            return
+        if self.path:
+            self.export(self.path)
+        # Auf stderr, damit die Übersicht keine JSON-Ausgabe auf stdout stört
+        print(f"\n⏱️ Trace ({len(self.spans)} Spans{f', {self.path}' if self.path else ''}):", file=sys.stderr)
+        print(self.format_summary(), file=sys.stderr)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.dropped = 0
+
+
+def _otlp_attributes(attributes):
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+def traced(name=None):
+    """Dekorator: jeder Aufruf der Funktion wird ein Span."""
+    def decorate(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def run_in_context(function):
+    """Für Thread-Pools: übernimmt den aktuellen Span als Eltern-Span in den Worker."""
+    context = contextvars.copy_context()
+    # Jeder Aufruf braucht eine eigene Kopie: ein Context ist nicht in mehreren Threads zugleich betretbar
+    return lambda *args, **kwargs: context.copy().run(function, *args, **kwargs)
+
+
+tracer = Tracer()
+if os.getenv("FINANCE_TRACE"):
+    tracer.enable(os.getenv("FINANCE_TRACE"))
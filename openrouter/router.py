@@ -0,0 +1,363 @@
+import os
+import json
+import time
+import threading
+from collections import deque, namedtuple
+
+import requests
+
+from common.llm import LLMError
+from common.tokens import count_tokens
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "openrouter_models.json")
+# Latenz- und Fehlerstatistik des Routers, damit kurze Skriptläufe auf früheren Messungen aufbauen
+STATE_PATH = os.path.join(os.path.dirname(CATALOG_PATH), "openrouter_router_state.json")
+CATALOG_TTL = 6 * 3600
+MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+# Platz für die Antwort, der zusätzlich zum Prompt ins Kontextfenster passen muss
+RESPONSE_TOKENS = 1024
+
+Model = namedtuple("Model", ["id", "context_length", "prompt_price", "completion_price"])
+
+
+def _price(pricing, key):
+    try:
+        return float((pricing or {}).get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_models(result):
+    """Wandelt die Antwort von /models in Model-Einträge (Preise in USD pro Token)."""
+    entries = result.get("data", []) if isinstance(result, dict) else result
+    if not isinstance(entries, list):
+        raise LLMError(f"Unerwartetes Format: {type(result)}")
+    return [
+        Model(entry["id"], int(entry.get("context_length") or 0),
+              _price(entry.get("pricing"), "prompt"), _price(entry.get("pricing"), "completion"))
+        for entry in entries if isinstance(entry, dict) and "id" in entry
+    ]
+
+
+class ModelCatalog:
+    """Lokal gespeicherter OpenRouter-Modellkatalog mit Kontextlänge und Preisen.
+
+    Ist die Datei älter als `ttl`, wird der alte Stand weiter ausgeliefert und
+    im Hintergrund neu geladen. Nur ohne jede lokale Kopie wird synchron geladen.
+    """
+
+    def __init__(self, api_key=None, path=CATALOG_PATH, ttl=CATALOG_TTL, url=MODELS_URL, timeout=30):
+        self.api_key = api_key
+        self.path = path
+        self.ttl = ttl
+        self.url = url
+        self.timeout = timeout
+        self.fetched = 0.0
+        self.refreshes = 0
+        self._models = None
+        self._lock = threading.Lock()
+        self._refreshing = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._models = {m["id"]: Model(**m) for m in data["models"]}
+            self.fetched = data["fetched"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._models = None
+
+    def _download(self):
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code != 200:
+            raise LLMError(f"Fehler beim Abrufen der Modelle: {response.status_code}\n{response.text[:200]}")
+        return parse_models(response.json())
+
+    def refresh(self):
+        """Lädt den Katalog neu und speichert ihn; bei Fehlern bleibt der alte Stand."""
+        models = self._download()
+        fetched = time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched": fetched, "models": [m._asdict() for m in models]}, f)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._models = {m.id: m for m in models}
+            self.fetched = fetched
+            self.refreshes += 1
+        return models
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Modellkatalog konnte nicht aktualisiert werden: {e}")
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+            self._refreshing = threading.Thread(target=self._refresh_quietly, daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def stale(self):
+        return time.time() - self.fetched > self.ttl
+
+    def models(self):
+        if self._models is None:
+            self.refresh()
+        elif self.stale():
+            self.refresh_in_background()
+        return self._models
+
+    def get(self, model_id):
+        return self.models().get(model_id)
+
+    def ids(self):
+        return list(self.models())
+
+
+class CircuitBreaker:
+    """Sperrt ein Modell nach `threshold` Fehlern in Folge für `cooldown` Sekunden.
+
+    Danach ist ein einzelner Probeaufruf erlaubt (half-open): Erfolg schließt
+    den Schalter, ein Fehler sperrt erneut mit verdoppelter Wartezeit.
+    """
+
+    def __init__(self, threshold=3, cooldown=60.0, max_cooldown=900.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_until = None
+        self.current_cooldown = cooldown
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_until is None:
+            return "closed"
+        return "open" if self.clock() < self.opened_until else "half-open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_until = None
+        self.current_cooldown = self.cooldown
+        self.probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.probing:
+            self.current_cooldown = min(self.max_cooldown, self.current_cooldown * 2)
+        if self.probing or self.failures >= self.threshold:
+            self.opened_until = self.clock() + self.current_cooldown
+        self.probing = False
+
+
+class ModelStats:
+    """Gleitendes Fenster der letzten Aufrufe eines Modells: Latenz und Fehlerquote."""
+
+    def __init__(self, window=20):
+        self.calls = deque(maxlen=window)
+
+    def add(self, seconds, ok):
+        self.calls.append((seconds, ok))
+
+    def latency(self):
+        timings = sorted(seconds for seconds, ok in self.calls if ok)
+        return timings[len(timings) // 2] if timings else None
+
+    def error_rate(self):
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls) if self.calls else 0.0
+
+
+class ModelRouter:
+    """Wählt je Anfrage das schnellste gesunde Modell, in dessen Kontext der Prompt passt.
+
+    Reihenfolge: Modelle mit zu hoher Fehlerquote ans Ende, sonst nach Median-
+    Latenz der letzten Aufrufe. Noch ungemessene Modelle kommen (in der
+    Reihenfolge von `candidates`) zuerst dran, damit jedes einmal gemessen
+    wird. Gesperrte Modelle (CircuitBreaker) werden übersprungen statt erneut
+    versucht.
+
+    Mit `state_path` werden Statistik und Schalterzustand nach jeder Anfrage
+    gespeichert und beim nächsten Start geladen; ohne gilt beides nur für die
+    Lebensdauer des Prozesses.
+    """
+
+    def __init__(self, client, candidates, catalog=None, provider="openrouter", window=20,
+                 max_error_rate=0.5, response_tokens=RESPONSE_TOKENS, threshold=3, cooldown=60.0,
+                 clock=time.monotonic, state_path=None):
+        self.client = client
+        self.candidates = list(candidates)
+        self.catalog = catalog
+        self.provider = provider
+        self.max_error_rate = max_error_rate
+        self.response_tokens = response_tokens
+        self.clock = clock
+        self.stats = {model: ModelStats(window) for model in self.candidates}
+        self.breakers = {model: CircuitBreaker(threshold, cooldown, clock=clock) for model in self.candidates}
+        self.state_path = state_path
+        # Gespeicherte Einträge anderer Modelle bleiben beim Speichern erhalten
+        self._other_state = {}
+        self._lock = threading.Lock()
+        if state_path is not None:
+            self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                entries = json.load(f)["models"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        # Sperrzeiten liegen als Uhrzeit in der Datei, clock() gilt nur innerhalb des Prozesses
+        offset = self.clock() - time.time()
+        for model, entry in entries.items():
+            if model not in self.stats:
+                self._other_state[model] = entry
+                continue
+            try:
+                calls = [(float(seconds), bool(ok)) for seconds, ok in entry["calls"]]
+                failures = int(entry["failures"])
+                cooldown = float(entry["cooldown"])
+                opened_until = None if entry["opened_until"] is None else float(entry["opened_until"]) + offset
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.stats[model].calls.extend(calls)
+            breaker = self.breakers[model]
+            breaker.failures, breaker.current_cooldown, breaker.opened_until = failures, cooldown, opened_until
+
+    def save_state(self):
+        """Schreibt Statistik und Schalterzustand nach `state_path`."""
+        if self.state_path is None:
+            return
+        with self._lock:
+            offset = time.time() - self.clock()
+            entries = dict(self._other_state)
+            for model in self.candidates:
+                breaker = self.breakers[model]
+                entries[model] = {
+                    "calls": list(self.stats[model].calls),
+                    "failures": breaker.failures,
+                    "cooldown": breaker.current_cooldown,
+                    "opened_until": None if breaker.opened_until is None else breaker.opened_until + offset,
+                }
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"saved": time.time(), "models": entries}, f)
+            os.replace(tmp, self.state_path)
+
+    def _save_quietly(self):
+        try:
+            self.save_state()
+        except OSError as e:
+            print(f"Router-Zustand konnte nicht gespeichert werden: {e}")
+
+    def _catalog_models(self):
+        # Ohne lokale Kopie lädt der Katalog synchron; scheitert das, gilt jedes Modell als passend
+        if self.catalog is None:
+            return None
+        try:
+            return self.catalog.models()
+        except Exception as e:
+            print(f"Modellkatalog nicht verfügbar, Kontextlänge wird nicht geprüft: {e}")
+            return None
+
+    def fits(self, model, prompt_tokens, models=None):
+        if models is None:
+            models = self._catalog_models()
+        info = models.get(model) if models else None
+        if info is None or not info.context_length:
+            return True
+        return prompt_tokens + self.response_tokens <= info.context_length
+
+    def ranked(self, prompt_tokens=0):
+        """Kandidaten in Versuchsreihenfolge (ohne gesperrte und zu kleine Modelle)."""
+        # Katalog vor dem Lock laden: ein Netzwerkabruf darf andere Anfragen nicht blockieren
+        models = self._catalog_models() or {}
+        with self._lock:
+            def key(item):
+                position, model = item
+                stats = self.stats[model]
+                latency = stats.latency()
+                return (stats.error_rate() > self.max_error_rate,
+                        0.0 if latency is None else latency, position)
+
+            usable = [(i, m) for i, m in enumerate(self.candidates)
+                      if self.breakers[m].state != "open" and self.fits(m, prompt_tokens, models)]
+            return [model for _, model in sorted(usable, key=key)]
+
+    def _record(self, model, seconds, ok):
+        with self._lock:
+            self.stats[model].add(seconds, ok)
+            if ok:
+                self.breakers[model].success()
+            else:
+                self.breakers[model].failure()
+
+    def complete(self, messages, **params):
+        """Gibt (Modell, Antwort) des ersten erfolgreichen Modells zurück.
+
+        Je Modell gibt es genau einen Versuch ohne Wiederholung: Ausweichen
+        übernehmen Reihenfolge und CircuitBreaker. Antworten aus dem LLMCache
+        des Clients gehen nicht in die Latenz-Statistik ein.
+        """
+        prompt_tokens = count_tokens("\n".join(str(m.get("content", "")) for m in messages))
+        order = self.ranked(prompt_tokens)
+        if not order:
+            raise LLMError(f"Kein verfügbares Modell für {prompt_tokens} Prompt-Tokens")
+
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            for model in order:
+                cached = cache.get(self.provider, model, messages, params)
+                if cached is not None:
+                    return model, cached
+
+        errors = []
+        try:
+            for model in order:
+                with self._lock:
+                    allowed = self.breakers[model].allow()
+                if not allowed:
+                    continue
+                started = self.clock()
+                try:
+                    result = self.client.complete_once(self.provider, model, messages, **params)
+                except Exception as e:
+                    self._record(model, self.clock() - started, False)
+                    errors.append(str(e))
+                    continue
+                self._record(model, self.clock() - started, True)
+                if cache is not None:
+                    cache.set(self.provider, model, messages, result, params)
+                return model, result
+        finally:
+            self._save_quietly()
+        raise LLMError("All models failed: " + " | ".join(errors))
+
+    def report(self):
+        with self._lock:
+            return {
+                model: {"state": self.breakers[model].state,
+                        "latency_s": None if self.stats[model].latency() is None else round(self.stats[model].latency(), 3),
+                        "error_rate": round(self.stats[model].error_rate(), 3),
+                        "calls": len(self.stats[model].calls)}
+                for model in self.candidates
+            }
@@ -1,8 +1,12 @@
 import os
-import requests
-import json
+import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.llm_cache import LLMCache
+from common.llm import LLMClient, LLMError, Provider
+from router import STATE_PATH, ModelCatalog, ModelRouter
+
 # .env laden
 load_dotenv()
 api_key = os.getenv("OPENROUTER_API_KEY")
@@ -10,89 +14,58 @@ api_key = os.getenv("OPENROUTER_API_KEY")
 if not api_key:
     raise EnvironmentError("OPENROUTER_API_KEY nicht gefunden!")
 
+llm_cache = LLMCache()
+
+# Modellkatalog (mit Kontextlänge und Preisen) liegt lokal und wird im Hintergrund erneuert
+catalog = ModelCatalog(api_key=api_key)
+
 # Verfügbare Modelle abfragen
 def get_models():
-    response = requests.get(
-        "https://openrouter.ai/api/v1/models",
-        headers={
-            "Authorization": f"Bearer {api_key}"
-        }
-    )
-    
-    if response.status_code == 200:
-        result = response.json()
-        # Debug: Was liefert die API wirklich?
-        if isinstance(result, dict):
-            if "data" in result:
-                return [model["id"] for model in result["data"]]
-            else:
-                # falls die API direkt eine Liste liefert oder das Ergebnis anders strukturiert ist
-                return [model["id"] for model in result]  # falls result eine Liste ist
-        else:
-            raise Exception(f"Unerwartetes Format: {type(result)}\n{result}")
-    else:
-        raise Exception(f"Fehler beim Abrufen der Modelle: {response.status_code}\n{response.text}")
+    return catalog.ids()
+
+# Ein gemeinsamer Client: gepoolte Verbindungen, Rate-Limit, Retry mit Backoff
+client = LLMClient(
+    providers={
+        "openrouter": Provider(
+            "openrouter", "https://openrouter.ai/api/v1", api_key=api_key,
+            headers={
+                "HTTP-Referer": "https://deinprojekt.local",  # Optional
+                "X-Title": "Testskript mit Claude"            # Optional
+            },
+        )
+    },
+    cache=llm_cache,
+)
+
+MODELS_TO_TRY = [
+    "anthropic/claude-sonnet-4",
+    "anthropic/claude-3-5-sonnet",
+    "anthropic/claude-3-haiku",
+    "openai/gpt-4o",
+    "openai/gpt-4o-mini"
+]
 
-# Chat mit Claude-3-Opus führen
+# Chat mit Claude-3-Opus führen (identische Prompts kommen aus dem Cache)
 def chat_with_claude(prompt, model="anthropic/claude-sonnet-4"):
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://deinprojekt.local",  # Optional
-            "X-Title": "Testskript mit Claude"            # Optional
-        },
-        data=json.dumps({
-            "model": model,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        })
-    )
-    
-    print(f"Status Code: {response.status_code}")
     print(f"Trying model: {model}")
-    
-    try:
-        response_data = response.json()
-        
-        if response.status_code == 200:
-            if "choices" in response_data and len(response_data["choices"]) > 0:
-                return response_data["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"Unexpected response format: {response_data}")
-        else:
-            # Check if it's an overloaded error
-            if "error" in response_data and "message" in response_data["error"]:
-                if "Overloaded" in response_data["error"]["message"]:
-                    raise Exception(f"Model {model} is currently overloaded. Try a different model.")
-            raise Exception(f"API Error: {response.status_code}\n{response_data}")
-    except json.JSONDecodeError as e:
-        print(f"Raw response text: {response.text}")
-        raise Exception(f"Failed to parse JSON response: {e}")
+    return client.complete("openrouter", model, [{"role": "user", "content": prompt}])
+
+# Wählt pro Anfrage das schnellste gesunde Modell, in dessen Kontext der Prompt passt;
+# Messungen und gesperrte Modelle gelten über den einzelnen Skriptlauf hinaus
+router = ModelRouter(client, MODELS_TO_TRY, catalog=catalog, state_path=STATE_PATH)
 
 def try_multiple_models(prompt):
-    """Try multiple models in case one is overloaded"""
-    models_to_try = [
-        "anthropic/claude-sonnet-4",
-        "anthropic/claude-3-5-sonnet",
-        "anthropic/claude-3-haiku",
-        "openai/gpt-4o",
-        "openai/gpt-4o-mini"
-    ]
-    
-    for model in models_to_try:
-        try:
-            print(f"\nTrying model: {model}")
-            result = chat_with_claude(prompt, model)
-            print(f"Success with {model}!")
-            return result
-        except Exception as e:
-            print(f"Failed with {model}: {str(e)}")
-            continue
-    
-    raise Exception("All models failed. Please try again later.")
+    """Try multiple models in case one is overloaded.
+
+    Die Reihenfolge richtet sich nach Latenz und Fehlerquote der letzten
+    Aufrufe; Modelle, die wiederholt scheitern, werden eine Zeit lang übersprungen.
+    """
+    try:
+        model, result = router.complete([{"role": "user", "content": prompt}])
+    except LLMError as e:
+        raise Exception(f"All models failed. Please try again later. ({e})")
+    print(f"Success with {model}!")
+    return result
 
 # Beispielnutzung
 if __name__ == "__main__":
@@ -103,5 +76,7 @@ if __name__ == "__main__":
     try:
         result = try_multiple_models("9.11 and 9.9, which one is larger?")
         print(f"\nAnswer: {result}")
+        print(f"LLM-Cache: {llm_cache.stats()}")
+        print(f"Router: {router.report()}")
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,227 @@
+import os
+import csv
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+from weights import WEIGHT_NAMES, find_column
+
+# Preisspalte aus der volantility-Ausgabe (bereinigte Kurse bevorzugt)
+PRICE_COLUMNS = ("Adj Close", "Close")
+CONFIDENCE_LEVELS = (0.95, 0.99)
+MIN_OBSERVATIONS = 30
+
+Analytics = namedtuple("Analytics", [
+    "start", "end", "observations", "periods_per_year", "coverage", "missing",
+    "positions", "tickers", "weights", "shrinkage", "volatility", "position_volatility",
+    "marginal", "component", "var", "drawdown", "position_drawdown", "correlated_pairs",
+    "hhi", "effective_n", "top5",
+])
+
+
+def load_prices(path):
+    """Liest die Ausgabe von volantility/extract.py (Langformat) als Matrix Datum × Ticker."""
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        long = pd.read_parquet(path)
+    elif path.endswith(".feather"):
+        long = pd.read_feather(path)
+    elif path.endswith(".xlsx"):
+        long = pd.read_excel(path)
+    else:
+        long = pd.read_csv(path)
+    column = next((c for c in PRICE_COLUMNS if c in long.columns and long[c].notna().any()), None)
+    if column is None:
+        raise ValueError(f"{path}: keine Spalte {' oder '.join(PRICE_COLUMNS)} gefunden.")
+    wide = long.pivot_table(index="Date", columns="Ticker", values=column, aggfunc="last")
+    wide.index = pd.to_datetime(wide.index)
+    return wide.sort_index()
+
+
+def load_ticker_map(path):
+    """ISIN → Ticker aus einer CSV-Datei mit den Spalten ISIN und Ticker."""
+    with open(path, newline="", encoding="utf-8") as f:
+        sample = f.read(2048)
+        f.seek(0)
+        reader = csv.DictReader(f, dialect=csv.Sniffer().sniff(sample, delimiters=",;\t"))
+        rows = [{key.strip().lower(): (value or "").strip() for key, value in row.items()} for row in reader]
+    return {row["isin"]: row["ticker"] for row in rows if row.get("isin") and row.get("ticker")}
+
+
+def periods_per_year(dates):
+    days = np.median(np.diff(dates.values).astype("timedelta64[D]").astype(float)) if len(dates) > 1 else 1
+    if days >= 25:
+        return 12
+    if days >= 5:
+        return 52
+    return 252
+
+
+def ledoit_wolf(returns):
+    """Ledoit-Wolf-Schätzer: Stichprobenkovarianz geschrumpft zur skalierten Einheitsmatrix.
+
+    Gibt (Kovarianz, Shrinkage-Intensität) zurück.
+    """
+    n, p = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / n
+    mu = np.trace(sample) / p
+    delta = ((sample - mu * np.eye(p)) ** 2).sum() / p
+    x2 = x ** 2
+    beta = ((x2.T @ x2).sum() / n - (sample ** 2).sum()) / (p * n)
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+    covariance = shrinkage * mu * np.eye(p) + (1 - shrinkage) * sample
+    return covariance, shrinkage
+
+
+def max_drawdown(returns):
+    """Maximaler Drawdown je Spalte (negativer Anteil, z. B. -0.25)."""
+    wealth = np.cumprod(1 + returns, axis=0)
+    peak = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=0)
+    return (wealth / peak - 1).min(axis=0)
+
+
+def value_at_risk(returns, levels=CONFIDENCE_LEVELS):
+    """Historischer und parametrischer (Normalverteilung) VaR/CVaR als positive Verlustquoten."""
+    mean, std = returns.mean(), returns.std(ddof=1)
+    result = {}
+    for level in levels:
+        cutoff = np.quantile(returns, 1 - level)
+        tail = returns[returns <= cutoff]
+        z = NormalDist().inv_cdf(1 - level)
+        result[level] = {
+            "historical_var": -cutoff,
+            "historical_cvar": -tail.mean(),
+            "parametric_var": -(mean + z * std),
+            "parametric_cvar": -(mean - std * NormalDist().pdf(z) / (1 - level)),
+        }
+    return result
+
+
+def correlated_pairs(covariance, weights, tickers, top=5, threshold=0.7):
+    """Stark korrelierte Positionspaare, sortiert nach gemeinsamem Gewicht."""
+    std = np.sqrt(np.diag(covariance))
+    correlation = covariance / np.outer(std, std)
+    i, j = np.triu_indices(len(tickers), k=1)
+    mask = correlation[i, j] >= threshold
+    i, j = i[mask], j[mask]
+    order = np.argsort(-(weights[i] + weights[j]))[:top]
+    return [(tickers[i[k]], tickers[j[k]], correlation[i[k], j[k]]) for k in order]
+
+
+def compute(weights_df, prices, ticker_map=None, min_observations=MIN_OBSERVATIONS):
+    """Risikokennzahlen für die Positionen aus weights.csv mit vorhandener Kurshistorie.
+
+    `weights_df` ist das Ergebnis von summary.load_weights; der Ticker kommt
+    aus einer Spalte "Ticker" oder über `ticker_map` aus der ISIN. Positionen
+    ohne Kurse (Cash, fehlende Zuordnung, zu kurze Historie) werden als nicht
+    abgedeckt gemeldet; die übrigen Gewichte werden auf 100 % normiert.
+    """
+    columns = {col.lower(): col for col in weights_df.columns}
+    # Gleiche Spaltenerkennung wie beim Einlesen (weights.py)
+    weight_col = find_column(weights_df.columns, WEIGHT_NAMES)
+    if weight_col is None:
+        raise ValueError(f"Keine Gewichtsspalte ({'/'.join(WEIGHT_NAMES)}) in den Gewichtungen.")
+    names = weights_df[columns.get("wertpapier", weight_col)].fillna("").astype(str).map(lambda n: " ".join(n.split()))
+    isins = weights_df[columns["isin"]].astype(str).str.strip() if "isin" in columns else names
+    if "ticker" in columns:
+        mapped = weights_df[columns["ticker"]].fillna("").astype(str).str.strip()
+    else:
+        mapped = isins.map(ticker_map or {}).fillna("")
+
+    raw_weights = weights_df[weight_col].to_numpy(dtype=float)
+    total = raw_weights.sum()
+    usable = prices.count() >= min_observations
+    positions, tickers, weights, missing = [], [], [], []
+    for name, isin, ticker, weight in zip(names, isins, mapped, raw_weights):
+        if weight <= 0:
+            continue
+        if ticker and ticker in usable.index and usable[ticker]:
+            positions.append(name or isin)
+            tickers.append(ticker)
+            weights.append(weight)
+        else:
+            missing.append((name or isin, weight))
+    if not tickers:
+        raise ValueError("Keine Position mit Kursdaten – Ticker-Zuordnung (--ticker-map) prüfen.")
+
+    # Gemeinsamer Zeitraum: Lücken vorwärts füllen, danach nur vollständige Zeilen
+    matrix = prices[list(dict.fromkeys(tickers))].ffill()
+    matrix = matrix[matrix.notna().all(axis=1)]
+    dates = matrix.index
+    price_values = matrix[tickers].to_numpy(dtype=float)
+    returns = price_values[1:] / price_values[:-1] - 1
+    if len(returns) < 2:
+        raise ValueError("Zu wenige gemeinsame Kursdaten für die Risikoanalyse.")
+
+    weights = np.asarray(weights) / np.sum(weights)
+    annual = periods_per_year(dates)
+    covariance, shrinkage = ledoit_wolf(returns)
+    variance = weights @ covariance @ weights
+    volatility = np.sqrt(variance)
+    marginal = covariance @ weights / volatility
+    component = weights * marginal
+    portfolio = returns @ weights
+
+    return Analytics(
+        start=dates[0], end=dates[-1], observations=len(returns), periods_per_year=annual,
+        coverage=1 - sum(weight for _, weight in missing) / total if total else 0.0, missing=missing,
+        positions=positions, tickers=tickers, weights=weights, shrinkage=shrinkage,
+        volatility=volatility * np.sqrt(annual),
+        position_volatility=np.sqrt(np.diag(covariance) * annual),
+        marginal=marginal * np.sqrt(annual), component=component / volatility,
+        var=value_at_risk(portfolio),
+        drawdown=max_drawdown(portfolio[:, None])[0],
+        position_drawdown=max_drawdown(returns),
+        correlated_pairs=correlated_pairs(covariance, weights, tickers),
+        hhi=float((weights ** 2).sum()), effective_n=float(1 / (weights ** 2).sum()),
+        top5=float(np.sort(weights)[::-1][:5].sum()),
+    )
+
+
+def pct(value):
+    return f"{value * 100:.1f} %"
+
+
+def format_analytics(result, top=12):
+    """Kompakte Markdown-Zusammenfassung für den Risiko-Prompt."""
+    period = "Tage" if result.periods_per_year == 252 else ("Wochen" if result.periods_per_year == 52 else "Monate")
+    lines = [
+        f"Zeitraum {result.start:%Y-%m-%d} bis {result.end:%Y-%m-%d} ({result.observations} {period}), "
+        f"{len(result.tickers)} Positionen mit Kursdaten = {pct(result.coverage)} des Portfolios (auf 100 % normiert)",
+        f"Volatilität p.a.: {pct(result.volatility)} | Max. Drawdown: {pct(result.drawdown)} | "
+        f"Shrinkage (Ledoit-Wolf): {result.shrinkage:.2f}",
+    ]
+    for level, values in result.var.items():
+        lines.append(
+            f"VaR/CVaR {level:.0%} je Periode: historisch {pct(values['historical_var'])} / "
+            f"{pct(values['historical_cvar'])}, parametrisch {pct(values['parametric_var'])} / "
+            f"{pct(values['parametric_cvar'])}"
+        )
+    lines.append(f"Konzentration: HHI {result.hhi:.3f}, effektive Anzahl {result.effective_n:.1f}, "
+                 f"Top-5-Gewicht {pct(result.top5)}")
+    if result.correlated_pairs:
+        lines.append("Hoch korreliert: " + ", ".join(f"{a}/{b} {rho:.2f}" for a, b, rho in result.correlated_pairs))
+
+    lines += ["", "| Position | Ticker | Gewicht | Vol p.a. | Risikobeitrag | Max DD |", "|---|---|---|---|---|---|"]
+    order = np.argsort(-result.component)[:top]
+    for i in order:
+        lines.append(f"| {result.positions[i]} | {result.tickers[i]} | {pct(result.weights[i])} | "
+                     f"{pct(result.position_volatility[i])} | {pct(result.component[i])} | "
+                     f"{pct(result.position_drawdown[i])} |")
+    if len(result.tickers) > top:
+        rest = np.argsort(-result.component)[top:]
+        lines.append(f"| übrige {len(rest)} | | {pct(result.weights[rest].sum())} | | "
+                     f"{pct(result.component[rest].sum())} | |")
+    if result.missing:
+        lines += ["", "Ohne Kursdaten: " + ", ".join(f"{name} ({weight:g} %)" for name, weight in result.missing)]
+    return "\n".join(lines)
+
+
+def portfolio_analytics_text(weights_df, prices_path, ticker_map_path=None):
+    if not os.path.exists(prices_path):
+        raise FileNotFoundError(f"{prices_path} nicht gefunden (zuerst volantility/extract.py ausführen).")
+    ticker_map = load_ticker_map(ticker_map_path) if ticker_map_path else None
+    return format_analytics(compute(weights_df, load_prices(prices_path), ticker_map))
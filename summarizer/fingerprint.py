@@ -0,0 +1,185 @@
+import re
+import json
+import math
+import hashlib
+
+# Erhöhen, wenn sich die Normalisierung ändert (alle Seiten gelten dann als geändert)
+FINGERPRINT_VERSION = 4
+
+# Fundamentaldaten (finviz-Snapshot, onvista-Kennzahlen): ändern sich mit Quartalszahlen,
+# Schätzungen oder Dividenden, nicht mit dem Kurs
+FUNDAMENTAL_LABELS = {
+    "index", "income", "sales", "employees", "shs outstand", "shs float",
+    "eps (ttm)", "eps next y", "eps next q", "eps this y", "eps next 5y", "eps past 5y", "sales past 5y",
+    "eps y/y ttm", "sales y/y ttm", "eps q/q", "sales q/q", "eps surprise", "sales surprise", "earnings",
+    "book/sh", "cash/sh", "roa", "roe", "roi", "gross margin", "oper. margin", "profit margin",
+    "quick ratio", "current ratio", "debt/eq", "lt debt/eq", "payout",
+    "dividend est.", "dividend ttm", "dividend ex-date",
+    "insider own", "inst own", "short float", "short interest", "recom", "target price",
+    "gewinn je aktie", "ergebnis je aktie", "gewinnwachstum", "dividende je aktie", "ausschüttungsquote",
+    "ebit", "ebitda", "jahresüberschuss", "umsatz", "umsatzwachstum", "umsatzrendite",
+    "eigenkapitalrendite", "gesamtkapitalrendite", "eigenkapitalquote", "verschuldungsgrad",
+    "buchwert je aktie", "cashflow je aktie", "mitarbeiter",
+}
+# Kurs bzw. Bewertung in Reihenfolge der Priorität. Gezählt wird nur die erste auf der Seite
+# vorhandene, in groben Stufen (siehe _bucket): KGV, Marktkapitalisierung & Co. sind Kurs mal
+# Fundamentaldaten, jede weitere Stufe würde nur zusätzliche Sprünge an Stufengrenzen bringen
+VALUATION_LABELS = ("price", "kurs", "aktueller kurs", "market cap", "marktkapitalisierung", "p/e", "kgv")
+# Breite einer Stufe: Werte innerhalb von ±5 % um die Stufenmitte gelten als gleich
+VALUATION_STEP = 0.10
+# Neueste Schlagzeilen, die in den Fingerabdruck eingehen (finviz listet die neueste zuerst)
+NEWS_HEADLINES = 3
+# Darunter ist das Layout unbekannt und der ganze Seitentext wird normalisiert
+MIN_FUNDAMENTALS = 5
+# Kurs-Tickerfelder und kursabhängige Felder für Seiten ohne erkannte Fundamentaldaten
+VOLATILE_LABELS = {
+    "price", "change", "volume", "rel volume", "avg volume", "prev close", "trades",
+    "atr (14)", "rsi (14)", "volatility", "perf week", "sma20",
+    "perf month", "perf quarter", "perf half y", "perf ytd", "perf year", "sma50", "sma200",
+    "52w high", "52w low", "52w range", "market cap", "p/e", "forward p/e", "peg", "p/s", "p/b", "p/c",
+    "p/fcf", "beta", "short ratio", "dividend est.", "dividend ttm",
+    "kurs", "aktueller kurs", "veränderung", "umsatz (stück)", "volumen", "geld", "brief",
+}
+# Zeilen, die nur Zeitangaben oder UI-Hinweise enthalten
+NOISE_LINES = re.compile(
+    r"^(?:"
+    r"(?:[A-Z][a-z]{2}-\d{2}-\d{2}\s+)?\d{1,2}:\d{2}\s*(?:AM|PM)"     # Aug-28-25 05:15PM / 05:15PM
+    r"|(?:heute|gestern|today|yesterday)?,?\s*\d{1,2}:\d{2}(?::\d{2})?(?:\s*uhr)?"
+    r"|\d{1,2}\.\d{1,2}\.\d{2,4}(?:,?\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*uhr)?)?"
+    r"|vor \d+ (?:sek\.?|sekunden|min\.?|minuten|std\.?|stunden)"
+    r"|\d+ (?:sec|min|mins|minutes|hours?) ago"
+    r"|.*(?:cookie|quotes delayed|zeitverzögert|realtime|echtzeit|anzeige|advertisement|copyright|©).*"
+    r")$",
+    re.IGNORECASE,
+)
+NUMBER = re.compile(r"^([-+]?)(\d[\d.,]*)(\s*(?:%|[A-Za-z]{1,4}\.?))?$")
+YEAR = re.compile(r"^(?:19|20)\d{2}e?$")
+EMPTY_VALUES = {"-", "n/a", "k.a."}
+# Rendite in Klammern hinter dem Dividendenbetrag ("1.04 (0.45%)") hängt am Kurs
+YIELD = re.compile(r"\s*\([-+]?[\d.,]+\s*%\)$")
+SIGNIFICANT_DIGITS = 2
+
+
+def _parse_number(digits):
+    """Liest "1.234,5", "1,234.5", "43,945,812" und "0,75"; "1.234" gilt als Tausender."""
+    separators = [c for c in digits if c in ".,"]
+    if not separators:
+        return float(digits)
+    last = separators[-1]
+    if len(set(separators)) == 2:
+        thousands = "," if last == "." else "."
+        return float(digits.replace(thousands, "").replace(last, "."))
+    if len(separators) > 1:
+        return float(digits.replace(last, ""))
+    integer, fraction = digits.split(last)
+    if len(fraction) == 3 and integer.strip("0"):
+        return float(integer + fraction)
+    return float(f"{integer or 0}.{fraction}")
+
+
+def _round_value(value):
+    """Rundet "34.71" → "35", "3427.38B" → "3400B", "12,08" → "12"; Text bleibt unverändert."""
+    match = NUMBER.match(value.strip())
+    if not match:
+        return value
+    sign, digits, unit = match.groups()
+    unit = (unit or "").strip()
+    number = _parse_number(digits)
+    rounded = float(f"{number:.{SIGNIFICANT_DIGITS}g}")
+    return f"{sign}{rounded:.0f}{unit}" if rounded >= 100 else f"{sign}{rounded:g}{unit}"
+
+
+def _bucket(value):
+    """Kurs oder Kennzahl als Stufe auf logarithmischer Skala: "34.71" → "~37", "3427.38B" → "~85B"."""
+    match = NUMBER.match(value.strip())
+    if not match:
+        return value
+    sign, digits, unit = match.groups()
+    number = _parse_number(digits)
+    if number <= 0:
+        return value
+    return f"{sign}~{round(math.log(number) / math.log(1 + VALUATION_STEP))}{(unit or '').strip()}"
+
+
+def _without_yield(value):
+    return YIELD.sub("", value)
+
+
+def fundamentals(text):
+    """Zeilen der Fundamentaldaten: Bezeichnung, dann ihr Wert bzw. ihre Werte je Jahr.
+
+    Auf die Bezeichnung folgt mindestens eine Wertzeile; weitere werden
+    übernommen, solange sie wie Zahlen aussehen (Jahresspalten). Der Kurs
+    (bzw. ohne Kurs die erste Bewertungskennzahl) geht nur als Stufe ein.
+    """
+    result = []
+    found = 0
+    lines = [" ".join(line.split()) for line in text.split("\n")]
+    lines = [line for line in lines if line]
+    present = {line.lower() for line in lines}
+    anchor = next((label for label in VALUATION_LABELS if label in present), None)
+    i = 0
+    while i < len(lines):
+        label = lines[i].lower()
+        if label not in FUNDAMENTAL_LABELS and label != anchor or i + 1 == len(lines):
+            i += 1
+            continue
+        found += label in FUNDAMENTAL_LABELS
+        value = _bucket if label == anchor else _without_yield
+        result.append(lines[i])
+        i += 1
+        result.append(value(lines[i]))
+        i += 1
+        while i < len(lines) and (NUMBER.match(lines[i]) or lines[i].lower() in EMPTY_VALUES):
+            result.append(value(lines[i]))
+            i += 1
+    return result if found >= MIN_FUNDAMENTALS else None
+
+
+def normalize_page(text):
+    """Fundamentaldaten der Seite und der Kurs in groben Stufen, ohne News.
+
+    Erwartet den zeilenweisen Text aus common.html_text (Bezeichnung und Wert
+    eines Snapshot-Felds stehen in aufeinanderfolgenden Zeilen). Findet sich
+    kein bekanntes Kennzahlen-Layout, wird der ganze Text ohne Zeitstempel,
+    UI-Hinweise und Kurs-Tickerfelder verwendet; Zeilen, die nur aus einer
+    Zahl bestehen, werden dann auf zwei signifikante Stellen gerundet.
+    """
+    lines = fundamentals(text)
+    if lines is not None:
+        return "\n".join(lines)
+
+    result = []
+    skip_value = False
+    for line in text.split("\n"):
+        line = " ".join(line.split())
+        if not line:
+            continue
+        # Leere Werte (z. B. "Trades") fehlen im Text: folgt direkt das nächste Tickerfeld, ist das kein Wert
+        if skip_value and line.lower() not in VOLATILE_LABELS:
+            skip_value = False
+            continue
+        skip_value = False
+        if line.lower() in VOLATILE_LABELS:
+            skip_value = True
+            continue
+        if NOISE_LINES.match(line):
+            continue
+        result.append(line if YEAR.match(line) else _round_value(line))
+    return "\n".join(result)
+
+
+def page_fingerprint(text, model, headlines=()):
+    """Hash über die normalisierte Seite und die neuesten `NEWS_HEADLINES` Schlagzeilen.
+
+    Neue Meldungen (Zahlen, Prognosen, Übernahmen) lösen so eine neue Analyse aus.
+    """
+    news = list(headlines)[:NEWS_HEADLINES]
+    payload = json.dumps([FINGERPRINT_VERSION, model, normalize_page(text), news], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def inputs_hash(*parts):
+    """Hash über alle Eingaben des Risikoberichts (Abschnitte, Gewichtungen, Optionen)."""
+    payload = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import threading
+from collections import namedtuple
+
+from lxml import etree
+
+from common.html_text import parse_html
+
+# Extrahierte Kennzahlen liegen neben den übrigen Caches im Repo-Verzeichnis .cache
+DEFAULT_KEY_FIGURES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "key_figures.json"
+)
+# Darunter gilt die Extraktion als gescheitert (z. B. geändertes Layout) und der Seitentext wird verwendet
+MIN_FIGURES = 5
+MAX_NEWS = 10
+
+# value: Zahl (oder None bei Text wie "S&P 500" oder "-"), unit: "%", "B", "EUR", "Mio." …, raw: Originaltext
+Figure = namedtuple("Figure", ["value", "unit", "raw"])
+# values: ein Figure je Eintrag in KeyFigures.periods
+Row = namedtuple("Row", ["group", "label", "values"])
+KeyFigures = namedtuple("KeyFigures", ["source", "name", "info", "periods", "rows", "news"])
+
+NUMBER = re.compile(r"^([-+]?\d[\d.,]*)\s*([%A-Za-z€$]{1,4}\.?)?$")
+PERIOD = re.compile(r"^(?:(?:19|20)\d{2}(?:/\d{2})?e?|Q[1-4] (?:19|20)\d{2}|TTM|ttm)$")
+FINVIZ_DATE = re.compile(r"^[A-Z][a-z]{2}-\d{2}-\d{2}")
+
+
+def parse_value(raw, decimal="."):
+    """"3427.38B" → Figure(3427.38, "B", …), "13.951 Mio." (decimal=",") → Figure(13951.0, "Mio.", …)."""
+    raw = " ".join(raw.split())
+    match = NUMBER.match(raw)
+    if not match:
+        return Figure(None, "", raw)
+    digits, unit = match.groups()
+    unit = unit or ""
+    thousands = "," if decimal == "." else "."
+    try:
+        value = float(digits.replace(thousands, "").replace(decimal, "."))
+    except ValueError:
+        return Figure(None, "", raw)
+    return Figure(value, unit, raw)
+
+
+def _text(element):
+    return " ".join(element.text_content().split()) if element is not None else ""
+
+
+def _first(root, xpath):
+    found = root.xpath(xpath)
+    return found[0] if found else None
+
+
+def parse_finviz(root, source):
+    """Snapshot-Tabelle einer finviz-Kursseite: Bezeichnung und Wert in abwechselnden td.snapshot-td2."""
+    cells = root.xpath("//table[contains(@class, 'snapshot-table2')]//td[contains(@class, 'snapshot-td2')]")
+    rows = [Row("Snapshot", _text(label), (parse_value(_text(value)),))
+            for label, value in zip(cells[0::2], cells[1::2]) if _text(label) and _text(value)]
+    if len(rows) < MIN_FIGURES:
+        return None
+
+    ticker = _text(_first(root, "//*[contains(@class, 'quote-header_ticker-wrapper_ticker')]"))
+    company = _text(_first(root, "//*[contains(@class, 'quote-header_ticker-wrapper_company')]"))
+    info = _text(_first(root, "//*[contains(@class, 'quote-links')]"))
+
+    news = []
+    date = ""
+    for row in root.xpath("//table[@id='news-table']//tr"):
+        link = _first(row, ".//a")
+        if link is None:
+            continue
+        # Weitere Meldungen desselben Tages haben nur eine Uhrzeit
+        stamp = _text(_first(row, "./td[1]"))
+        if FINVIZ_DATE.match(stamp):
+            date = stamp.split()[0]
+        news.append(f"{date}: {_text(link)}" if date else _text(link))
+        if len(news) >= MAX_NEWS:
+            break
+    name = " – ".join(part for part in (ticker, company) if part)
+    return KeyFigures(source, name, info, ("",), rows, news)
+
+
+def parse_period_tables(root, source):
+    """Kennzahlen-Tabellen mit Jahresspalten (onvista): Gruppe aus der vorangehenden Überschrift."""
+    periods = None
+    rows = []
+    for table in root.iter("table"):
+        header = [_text(cell) for cell in table.xpath(".//tr[th][1]/th")]
+        if len(header) < 2 or not all(PERIOD.match(cell) for cell in header[1:]):
+            continue
+        # Alle Tabellen der Seite teilen sich die Jahresspalten; abweichende werden übergangen
+        if periods is None:
+            periods = tuple(header[1:])
+        elif tuple(header[1:]) != periods:
+            continue
+        heading = _first(table, "preceding::*[self::h2 or self::h3][1]")
+        group = _text(heading) or header[0]
+        for tr in table.xpath(".//tr[td]"):
+            cells = [_text(td) for td in tr.xpath("./td")]
+            if len(cells) == len(periods) + 1 and cells[0]:
+                rows.append(Row(group, cells[0], tuple(parse_value(cell, decimal=",") for cell in cells[1:])))
+    if len(rows) < MIN_FIGURES:
+        return None
+    name = _text(_first(root, "//h1")) or root.findtext(".//title") or source
+    info = _text(_first(root, "//h1/following-sibling::p[1]"))
+    return KeyFigures(source, name, info, periods, rows, [])
+
+
+PARSERS = (parse_finviz, parse_period_tables)
+
+
+def extract_key_figures(content, source="", encoding=None):
+    """KeyFigures der Seite oder None, wenn kein bekanntes Kennzahlen-Layout gefunden wurde.
+
+    `encoding` ist der Zeichensatz aus dem Content-Type-Header, sonst wird er erkannt.
+    """
+    try:
+        root = parse_html(content, encoding)
+    except (etree.ParserError, ValueError):
+        return None
+    for parse in PARSERS:
+        record = parse(root, source)
+        if record is not None:
+            return record
+    return None
+
+
+def figures_text(record):
+    """Kompakte Darstellung für den Prompt: eine Zeile je Kennzahl bzw. eine Tabelle je Gruppe."""
+    lines = [record.name]
+    if record.info:
+        lines.append(record.info)
+    group = None
+    for row in record.rows:
+        if row.group != group:
+            group = row.group
+            lines.append(f"\n### {group}")
+            if len(record.periods) > 1:
+                lines.append(" | ".join(("Kennzahl",) + record.periods))
+        lines.append(" | ".join([row.label] + [figure.raw for figure in row.values])
+                     if len(record.periods) > 1 else f"{row.label}: {row.values[0].raw}")
+    if record.news:
+        lines.append("\n### News")
+        lines.extend(f"- {headline}" for headline in record.news)
+    return "\n".join(lines)
+
+
+def fingerprint_text(record):
+    """Bezeichnung und Werte zeilenweise wie im Seitentext, damit fingerprint.normalize_page greift.
+
+    News fehlen hier, sie gehen getrennt über page_fingerprint(headlines=record.news) ein.
+    """
+    lines = list(record.periods)
+    for row in record.rows:
+        lines.append(row.label)
+        lines.extend(figure.raw for figure in row.values)
+    return "\n".join(lines)
+
+
+def to_dict(record):
+    return {**record._asdict(), "rows": [[row.group, row.label, [list(f) for f in row.values]] for row in record.rows]}
+
+
+def from_dict(data):
+    rows = [Row(group, label, tuple(Figure(*f) for f in values)) for group, label, values in data["rows"]]
+    return KeyFigures(data["source"], data["name"], data["info"], tuple(data["periods"]), rows, list(data["news"]))
+
+
+class KeyFigureStore:
+    """Zuletzt extrahierte Kennzahlen je Ticker, gültig für den Tag der Extraktion.
+
+    Ein zweiter Lauf am selben Tag baut den Prompt aus dem gespeicherten
+    Datensatz, ohne die Seite erneut zu laden.
+    """
+
+    def __init__(self, path=DEFAULT_KEY_FIGURES_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def get(self, identifier, day):
+        with self._lock:
+            entry = self.entries.get(identifier)
+            if entry and entry["day"] == day:
+                try:
+                    record = from_dict(entry["record"])
+                except (KeyError, TypeError, ValueError):
+                    record = None
+                if record is not None:
+                    self.hits += 1
+                    return record
+            self.misses += 1
+            return None
+
+    def set(self, identifier, day, record):
+        with self._lock:
+            self.entries[identifier] = {"day": day, "record": to_dict(record)}
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -0,0 +1,200 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common.html_text import element_text, parse_html
+
+# Digests liegen neben dem LLM-Cache im Repo-Verzeichnis .cache
+DEFAULT_DIGEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "risk_digests.json"
+)
+DEFAULT_FAN_IN = 8
+
+digest_prompt = (
+    "Verdichte die folgende Aktienanalyse zu einem kompakten Risiko-Digest für einen Portfolio-Risikobericht. "
+    "Antworte in höchstens 120 Wörtern auf Deutsch, genau in diesem Format:\n"
+    "Titel: <Ticker oder Name>\n"
+    "Bewertung: <über-/unterbewertet, wichtigste Multiples>\n"
+    "Fundamentaldaten: <Stärken/Schwächen>\n"
+    "Zyklik: <Branche, Konjunkturabhängigkeit>\n"
+    "Makro: <Zinsen, Währung, Regulierung, Region>\n"
+    "Hauptrisiken: <max. 3 Stichpunkte>"
+)
+
+reduce_prompt = (
+    "Fasse die folgenden Risiko-Digests mehrerer Portfolio-Positionen zu einem gemeinsamen Digest zusammen. "
+    "Behalte alle Titel namentlich bei, nenne Überbewertungen, schwache Fundamentaldaten und zyklische Schwächen "
+    "je Titel in einem Satz und hebe gemeinsame Risiken (Branchen, Regionen, Makrofaktoren) hervor, "
+    "die auf Klumpenrisiken hindeuten. Höchstens 250 Wörter, Deutsch."
+)
+
+
+def is_error(text):
+    return not text or text.startswith("[Fehler") or "\n\n[Fehler " in text
+
+
+def analysis_hash(identifier, analysis, model):
+    payload = json.dumps([identifier, analysis, model, digest_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def merge_hash(group, model):
+    payload = json.dumps([group, model, reduce_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DigestStore:
+    """Risiko-Digest pro Position, abgelegt unter (Ticker, Hash der Analyse).
+
+    Pro Ticker wird nur der jüngste Digest gehalten; ändert sich die Analyse
+    (oder das Modell), passt der Hash nicht mehr und der Digest wird neu erstellt.
+    Zusammenfassungen mehrerer Digests liegen unter dem Hash ihrer Eingaben;
+    gespeichert werden nur die im aktuellen Lauf verwendeten.
+    """
+
+    def __init__(self, path=DEFAULT_DIGEST_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.merge_hits = 0
+        self._lock = threading.Lock()
+        self._used_merges = set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        # Ältere Dateien enthalten nur die Digests
+        if isinstance(data.get("digests"), dict) and isinstance(data.get("merges"), dict):
+            self.entries, self.merges = data["digests"], data["merges"]
+        else:
+            self.entries, self.merges = data, {}
+
+    def get(self, identifier, digest_hash):
+        with self._lock:
+            entry = self.entries.get(identifier)
+            if entry and entry["hash"] == digest_hash:
+                self.hits += 1
+                return entry["digest"]
+            self.misses += 1
+            return None
+
+    def set(self, identifier, digest_hash, digest):
+        with self._lock:
+            self.entries[identifier] = {"hash": digest_hash, "digest": digest}
+
+    def get_merge(self, merge_hash):
+        with self._lock:
+            self._used_merges.add(merge_hash)
+            merged = self.merges.get(merge_hash)
+            if merged is not None:
+                self.merge_hits += 1
+            return merged
+
+    def set_merge(self, merge_hash, merged):
+        with self._lock:
+            self._used_merges.add(merge_hash)
+            self.merges[merge_hash] = merged
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            merges = {key: value for key, value in self.merges.items() if key in self._used_merges}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"digests": self.entries, "merges": merges}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+                "merge_hits": self.merge_hits}
+
+
+class RiskReducer:
+    """Map-Reduce über die Einzelanalysen statt eines großen Prompts.
+
+    Map: jede Analyse wird zu einem kurzen Digest verdichtet (gecacht pro
+    Position). Reduce: Digests werden in Gruppen zu je `fan_in` zusammengefasst,
+    bis höchstens `fan_in` übrig sind; diese gehen in den finalen Bericht.
+    Ändert sich eine Position, entstehen ihr Digest und je Ebene die eine
+    Zusammenfassung auf ihrem Pfad neu (deren Eingabe hat sich geändert) –
+    alle anderen Gruppen kommen aus dem Merge-Cache des DigestStore.
+
+    `ask(task, messages)` ist der LLM-Aufruf aus summary.py, `model` der Name
+    des Digest-Modells (Teil des Cache-Schlüssels).
+    """
+
+    def __init__(self, ask, model, store=None, fan_in=DEFAULT_FAN_IN, workers=8):
+        self.ask = ask
+        self.model = model
+        self.store = store if store is not None else DigestStore()
+        self.fan_in = max(2, fan_in)
+        self.workers = workers
+        self.calls = 0
+
+    def _complete(self, system, content):
+        self.calls += 1
+        return self.ask("summary", [
+            {"role": "system", "content": system},
+            {"role": "user", "content": content},
+        ])
+
+    def digest(self, identifier, analysis):
+        if is_error(analysis):
+            return f"Titel: {identifier}\nKeine Analyse verfügbar ({analysis.strip()[:120]})"
+        digest_hash = analysis_hash(identifier, analysis, self.model)
+        cached = self.store.get(identifier, digest_hash)
+        if cached is not None:
+            return cached
+        result = self._complete(digest_prompt, f"Titel: {identifier}\n\n{analysis}")
+        if not is_error(result):
+            self.store.set(identifier, digest_hash, result)
+        return result
+
+    def digests(self, analyses):
+        """analyses: Liste von (Ticker, Analyse) in Berichtsreihenfolge."""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(analyses)))) as pool:
+            results = list(pool.map(lambda item: self.digest(*item), analyses))
+        self.store.save()
+        return results
+
+    def reduce(self, digests):
+        """Fasst Digests ebenenweise zusammen, bis höchstens `fan_in` übrig sind."""
+        level = list(digests)
+        while len(level) > self.fan_in:
+            groups = [level[i:i + self.fan_in] for i in range(0, len(level), self.fan_in)]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(groups)))) as pool:
+                level = list(pool.map(self._merge, groups))
+        return level
+
+    def _merge(self, group):
+        if len(group) == 1:
+            return group[0]
+        key = merge_hash(group, self.model)
+        cached = self.store.get_merge(key)
+        if cached is not None:
+            return cached
+        result = self._complete(reduce_prompt, "\n\n---\n\n".join(group))
+        if not is_error(result):
+            self.store.set_merge(key, result)
+        return result
+
+    def run(self, analyses):
+        """Gibt die verdichteten Detailanalysen für den finalen Risikobericht zurück."""
+        details = "\n\n---\n\n".join(self.reduce(self.digests(analyses)))
+        self.store.save()
+        return details
+
+
+def analyses_from_html(path):
+    """Liest (Überschrift, Analyse)-Paare aus einem von summary.py erzeugten Bericht."""
+    with open(path, "rb") as f:
+        root = parse_html(f.read())
+    analyses = []
+    for heading in root.iter("h2"):
+        section = heading.getnext()
+        if section is not None and section.tag == "div":
+            analyses.append((heading.text_content().strip(), element_text(section)))
+    return analyses
@@ -0,0 +1,187 @@
+import json
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL,
+    options TEXT,
+    risk_report TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    identifier TEXT NOT NULL,
+    fetch_status TEXT NOT NULL DEFAULT 'pending',
+    fetch_seconds REAL,
+    llm_status TEXT NOT NULL DEFAULT 'pending',
+    llm_seconds REAL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL,
+    PRIMARY KEY (run_id, identifier)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    identifier TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    result TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+# Schritt übersprungen, weil sich die Seite seit dem letzten Lauf nicht geändert hat
+UNCHANGED = "unchanged"
+DONE_STATUSES = ("ok", UNCHANGED)
+# Seite nicht geladen, die Kennzahlen vom selben Tag lagen bereits vor (siehe keyfigures.py)
+CACHED = "cached"
+
+
+class RunStore:
+    """Zustand eines Batch-Laufs in SQLite: Status, Zeiten und Ergebnis je Ticker.
+
+    Jeder Schritt wird sofort festgeschrieben. Bricht der Prozess ab, kann der
+    Lauf mit `--resume` fortgesetzt werden; erneut bearbeitet werden nur
+    Einträge, deren LLM-Schritt nicht erfolgreich war.
+
+    Für den inkrementellen Modus hält `pages` je Ticker den Fingerabdruck der
+    Seite und die zugehörige Analyse über alle Läufe hinweg.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "risk_inputs" not in columns:
+            # Dateien aus älteren Versionen ohne Eingabe-Hash des Risikoberichts
+            self._conn.execute("ALTER TABLE runs ADD COLUMN risk_inputs TEXT")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start_run(self, identifiers, options=None):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started, status, options) VALUES (?, 'running', ?)",
+                (time.time(), json.dumps(options or {})),
+            )
+            run_id = cursor.lastrowid
+        self.add_items(run_id, identifiers)
+        return run_id
+
+    def add_items(self, run_id, identifiers):
+        """Legt fehlende Einträge an und übernimmt die aktuelle Reihenfolge."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for position, identifier in enumerate(identifiers):
+                self._conn.execute(
+                    "INSERT INTO items (run_id, position, identifier) VALUES (?, ?, ?) "
+                    "ON CONFLICT (run_id, identifier) DO UPDATE SET position = excluded.position",
+                    (run_id, position, identifier),
+                )
+            self._conn.execute("COMMIT")
+
+    def latest_run(self):
+        rows = self._execute("SELECT id FROM runs ORDER BY id DESC LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def resume_run(self, identifiers):
+        """Setzt den letzten Lauf fort (oder startet einen neuen, falls es keinen gibt)."""
+        run_id = self.latest_run()
+        if run_id is None:
+            return self.start_run(identifiers)
+        self._execute("UPDATE runs SET status = 'running', finished = NULL WHERE id = ?", (run_id,))
+        self.add_items(run_id, identifiers)
+        return run_id
+
+    def record(self, run_id, identifier, stage, status, seconds, result=None, error=None):
+        """Hält das Ergebnis eines Schritts fest (`stage`: "fetch" oder "llm")."""
+        if stage not in ("fetch", "llm"):
+            raise ValueError(f"Unbekannter Schritt: {stage}")
+        assignments = f"{stage}_status = ?, {stage}_seconds = ?, error = ?, updated = ?"
+        params = [status, seconds, error, time.time()]
+        if stage == "fetch":
+            assignments += ", attempts = attempts + 1"
+        if result is not None:
+            assignments += ", result = ?"
+            params.append(result)
+        self._execute(f"UPDATE items SET {assignments} WHERE run_id = ? AND identifier = ?",
+                      (*params, run_id, identifier))
+
+    def recorder(self, run_id):
+        return lambda identifier, *args, **kwargs: self.record(run_id, identifier, *args, **kwargs)
+
+    def completed(self, run_id):
+        """identifier → Ergebnis für alle erfolgreich analysierten Einträge."""
+        rows = self._execute("SELECT identifier, result FROM items WHERE run_id = ? AND llm_status IN (?, ?)",
+                             (run_id, *DONE_STATUSES))
+        return dict(rows)
+
+    def items(self, run_id):
+        rows = self._execute(
+            "SELECT identifier, fetch_status, fetch_seconds, llm_status, llm_seconds, result, error, attempts "
+            "FROM items WHERE run_id = ? ORDER BY position", (run_id,),
+        )
+        keys = ("identifier", "fetch_status", "fetch_seconds", "llm_status", "llm_seconds", "result", "error", "attempts")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def page(self, identifier, max_age=None):
+        """(Fingerabdruck, Analyse) des letzten erfolgreich analysierten Stands oder None.
+
+        Mit `max_age` (Sekunden) gilt eine ältere Analyse als nicht vorhanden.
+        """
+        rows = self._execute("SELECT fingerprint, result, updated FROM pages WHERE identifier = ?", (identifier,))
+        if not rows or (max_age is not None and time.time() - rows[0][2] > max_age):
+            return None
+        return rows[0][:2]
+
+    def set_page(self, identifier, fingerprint, result):
+        self._execute(
+            "INSERT INTO pages (identifier, fingerprint, result, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (identifier) DO UPDATE SET fingerprint = excluded.fingerprint, "
+            "result = excluded.result, updated = excluded.updated",
+            (identifier, fingerprint, result, time.time()),
+        )
+
+    def set_risk_report(self, run_id, text, inputs=None):
+        self._execute("UPDATE runs SET risk_report = ?, risk_inputs = ? WHERE id = ?", (text, inputs, run_id))
+
+    def previous_risk_report(self, inputs):
+        """Jüngster gespeicherter Risikobericht mit denselben Eingaben oder None."""
+        rows = self._execute("SELECT risk_report FROM runs WHERE risk_inputs = ? AND risk_report IS NOT NULL "
+                             "ORDER BY id DESC LIMIT 1", (inputs,))
+        return rows[0][0] if rows else None
+
+    def risk_report(self, run_id):
+        rows = self._execute("SELECT risk_report FROM runs WHERE id = ?", (run_id,))
+        return rows[0][0] if rows else None
+
+    def finish_run(self, run_id):
+        failed = self._execute("SELECT COUNT(*) FROM items WHERE run_id = ? AND llm_status NOT IN (?, ?)",
+                               (run_id, *DONE_STATUSES))[0][0]
+        status = "failed" if failed else "done"
+        self._execute("UPDATE runs SET status = ?, finished = ? WHERE id = ?", (status, time.time(), run_id))
+        return status
+
+    def summary(self, run_id):
+        rows = self._execute(
+            "SELECT fetch_status, llm_status, COUNT(*), SUM(fetch_seconds), SUM(llm_seconds) "
+            "FROM items WHERE run_id = ? GROUP BY fetch_status, llm_status", (run_id,),
+        )
+        return [
+            {"fetch": fetch, "llm": llm, "count": count, "fetch_seconds": round(fetch_s or 0, 2),
+             "llm_seconds": round(llm_s or 0, 2)}
+            for fetch, llm, count, fetch_s, llm_s in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
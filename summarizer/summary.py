@@ -1,71 +1,77 @@
 import os
-import json
+import re
+import sys
 import argparse
+import time
+import threading
 import requests
-import pandas as pd
-import csv
-from bs4 import BeautifulSoup
 from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-import openai
-from openai import OpenAI as OpenRouterClient
 
-# Argumente parsen
-parser = argparse.ArgumentParser()
-parser.add_argument("--local", action="store_true")
-parser.add_argument("--openrouter", action="store_true")
-args = parser.parse_args()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.llm_cache import LLMCache
+from common.llm import LLMClient
+from common.html_text import charset, extract
+from common.tracing import run_in_context, traced, tracer
+from analytics import portfolio_analytics_text
+from fingerprint import inputs_hash, page_fingerprint
+from keyfigures import KeyFigureStore, extract_key_figures, figures_text, fingerprint_text
+from risk import DEFAULT_FAN_IN, RiskReducer, analyses_from_html, is_error
+from runstate import CACHED, UNCHANGED, RunStore
+from weights import WeightsCache, file_hash, load_weights as read_weights
 
-use_local = args.local
-use_openrouter = args.openrouter
+use_local = False
+use_openrouter = False
+llm_cache = LLMCache(enabled=False)
+llm_client = None
+fallbacks = []
+hedge_after = None
+weights_cache = WeightsCache()
+# Inkrementeller Modus: RunStore mit den Fingerabdrücken der zuletzt analysierten Seiten
+page_store = None
+# Ältere Analysen werden auch bei unverändertem Fingerabdruck neu erstellt (--max-age)
+page_max_age = 7 * 86400
+# Prompt aus den extrahierten Kennzahlen statt aus dem ganzen Seitentext (--raw-text schaltet ab)
+use_key_figures = True
+key_figure_store = KeyFigureStore()
 
 # Modellnamen und Dateipfade
 ollama_model = "deepseek-r1:7b"
+openrouter_model = "qwen/qwen3-235b-a22b"
+models = {
+    "ollama": {"summary": ollama_model, "risk": ollama_model},
+    "openrouter": {"summary": openrouter_model, "risk": openrouter_model},
+    "openai": {"summary": "gpt-4o-mini", "risk": "gpt-4o"},
+}
+error_labels = {
+    "ollama": "vom lokalen Modell",
+    "openrouter": "von OpenRouter API",
+    "openai": "von OpenAI API",
+}
 overview_file = "overview.html"
 risk_file = "risk_report.html"
 weights_file = "weights.csv"
+ticker_map_file = "ticker_map.csv"
+run_state_file = "run_state.sqlite"
 
-# Umgebungsvariablen laden
-load_dotenv(override=True)
-api_key = os.getenv("OPENAI_API_KEY")
-openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-
-if not use_local and not use_openrouter:
-    if not api_key or not api_key.startswith("sk-proj-"):
-        raise ValueError("Invalid or missing OpenAI API key.")
-    openai.api_key = api_key
-
-if use_openrouter:
-    if not openrouter_api_key:
-        raise ValueError("Fehlender OpenRouter API Key.")
-    openrouter_client = OpenRouterClient(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=openrouter_api_key
-    )
+# Parallelität: gleichzeitige Seitenabrufe pro Host (LLM-Limits liegen im LLMClient)
+max_workers = 8
+max_per_host = 4
 
 headers = {"User-Agent": "Mozilla/5.0"}
 today = datetime.today().strftime("%Y-%m-%d")
+# Das Tagesdatum im Prompt zählt nicht zum Schlüssel des LLM-Caches, sonst träfe er über Nacht nie;
+# gecachte Antworten gelten so lange wie die TTL des Caches
+PROMPT_DATE = re.compile(r"Heute ist der \d{4}-\d{2}-\d{2}\. ")
 
 # Ticker oder URLs
 tickers = list(dict.fromkeys([
     "SHOP", "https://www.onvista.de/aktien/kennzahlen/Allianz-Aktie-DE0008404005", "https://www.onvista.de/aktien/kennzahlen/Muenchener-Rueck-Aktie-DE0008430026"
 ]))
 
-# Gewichtungen laden
-if not os.path.exists(weights_file):
-    raise FileNotFoundError("weights.csv nicht gefunden.")
-
-with open(weights_file, newline='', encoding='utf-8') as f:
-    sample = f.read(2048)
-    dialect = csv.Sniffer().sniff(sample)
-    f.seek(0)
-    df_weights = pd.read_csv(f, delimiter=dialect.delimiter)
-
-df_weights.columns = [col.strip() for col in df_weights.columns]
-gewichtung_col = [col for col in df_weights.columns if "gewicht" in col.lower()][0]
-df_weights[gewichtung_col] = df_weights[gewichtung_col].astype(str).str.replace(",", ".", regex=False).astype(float)
-weights_text = df_weights.to_markdown(index=False)
-
 system_prompt = (
     f"Heute ist der {today}. "
     "Du agierst in der Rolle eines Weltklasse-Finanzanalysten. Analysiere eine Aktie basierend auf den Webseiteninhalten. "
@@ -78,69 +84,157 @@ system_prompt = (
     "Antworte in deutscher Sprache im Markdown-Format."
 )
 
+# Verbindungen pro Thread wiederverwenden (Keep-Alive statt neuer TCP/TLS-Handshakes)
+_local = threading.local()
+_host_limits = {}
+_limits_lock = threading.Lock()
+
+def http_session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_per_host, pool_maxsize=max_per_host)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(headers)
+        _local.session = session
+    return session
+
+def _limit(registry, key, size):
+    with _limits_lock:
+        if key not in registry:
+            registry[key] = threading.BoundedSemaphore(size)
+        return registry[key]
+
+def host_limit(url):
+    return _limit(_host_limits, urlparse(url).netloc, max_per_host)
+
+def current_provider():
+    if use_local:
+        return "ollama"
+    return "openrouter" if use_openrouter else "openai"
+
 class Website:
     def __init__(self, url):
         self.url = url
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        self.title = soup.title.string if soup.title else "No title found"
-        for tag in soup.body(["script", "style", "img", "input"]):
-            tag.decompose()
-        self.text = soup.body.get_text(separator="\n", strip=True)
+        with tracer.span("website", url=url) as span:
+            queued = time.perf_counter()
+            with host_limit(url):
+                if span.recording:
+                    span.set(queue_s=time.perf_counter() - queued)
+                with tracer.span("website.fetch") as fetch:
+                    response = http_session().get(url)
+                    fetch.set(status=response.status_code, bytes=len(response.content))
+            encoding = charset(response.headers.get("Content-Type"))
+            with tracer.span("website.parse"):
+                page = extract(response.content, encoding=encoding)
+            self.key_figures = None
+            if use_key_figures:
+                with tracer.span("website.key_figures") as parse:
+                    self.key_figures = extract_key_figures(response.content, urlparse(url).netloc, encoding)
+                    parse.set(rows=len(self.key_figures.rows) if self.key_figures else 0)
+        self.title = page.title
+        self.text = page.text
 
 def user_prompt_for(website):
     return f"You are looking at a financial website titled '{website.title}'.\n\nHere is the scraped text content:\n\n{website.text}"
 
-def messages_for(website):
+def key_figures_prompt_for(figures):
+    return f"You are looking at key figures extracted from the financial website {figures.source}:\n\n{figures_text(figures)}"
+
+def messages_for(user_prompt):
     return [
         {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt_for(website)}
+        {"role": "user", "content": user_prompt}
     ]
 
-def summarize(identifier):
+def no_record(*args, **kwargs):
+    pass
+
+def summarize(identifier, on_delta=None, record=no_record):
+    """Lädt und analysiert einen Ticker; `record` erhält Status und Dauer jedes Schritts (siehe runstate.py)."""
     if identifier.startswith("http"):
         url = identifier
     else:
         url = f"https://finviz.com/quote.ashx?t={identifier}&ty=c&ta=1&p=d"
 
     print(f"\n🔍 {identifier}")
-    try:
-        website = Website(url)
-    except Exception as e:
-        return f"[Fehler beim Laden: {e}]"
-
-    if use_local:
-        prompt = f"{system_prompt}\n\n{user_prompt_for(website)}"
-        payload = {"model": ollama_model, "prompt": prompt, "stream": False}
-        try:
-            r = requests.post("http://localhost:11434/api/generate", headers={"Content-Type": "application/json"}, data=json.dumps(payload))
-            r.raise_for_status()
-            return r.json().get("response", "[Fehler: Kein response-Feld]")
-        except Exception as e:
-            return f"[Fehler vom lokalen Modell: {e}]"
+    with tracer.span("summarize", identifier=identifier):
+        return _summarize(identifier, url, on_delta, record)
 
-    elif use_openrouter:
+def _summarize(identifier, url, on_delta, record):
+    # Kennzahlen werden einmal am Tag geladen; weitere Läufe bauen den Prompt aus dem Cache
+    figures = key_figure_store.get(identifier, today) if use_key_figures else None
+    if figures is not None:
+        tracer.count("key_figures.cached")
+        record(identifier, "fetch", CACHED, 0.0)
+    else:
+        started = time.perf_counter()
         try:
-            response = openrouter_client.chat.completions.create(
-                model="qwen/qwen3-235b-a22b",
-                messages=messages_for(website),
-                extra_headers={
-                    "HTTP-Referer": "https://deinprojekt.de",
-                    "X-Title": "FinanzanalyseTool"
-                }
-            )
-            return response.choices[0].message.content
+            website = Website(url)
         except Exception as e:
-            return f"[Fehler von OpenRouter API: {e}]"
+            result = f"[Fehler beim Laden: {e}]"
+            record(identifier, "fetch", "error", time.perf_counter() - started, result=result, error=str(e))
+            return result
+        record(identifier, "fetch", "ok", time.perf_counter() - started)
+        figures = website.key_figures
+        if figures is not None:
+            key_figure_store.set(identifier, today, figures)
+        elif use_key_figures:
+            print(f"⚠️ {identifier}: keine Kennzahlen-Tabelle erkannt, sende den Seitentext")
+            tracer.count("key_figures.fallback")
 
+    if figures is not None:
+        user_prompt, page_text, headlines = key_figures_prompt_for(figures), fingerprint_text(figures), figures.news
     else:
-        try:
-            response = openai.chat.completions.create(model="gpt-4o-mini", messages=messages_for(website))
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"[Fehler von OpenAI API: {e}]"
+        # Ohne Kennzahlen-Layout sind die Schlagzeilen nicht erkennbar; hier greift nur --max-age
+        user_prompt, page_text, headlines = user_prompt_for(website), website.text, ()
 
-def generate_html(title, sections, path):
+    fingerprint = None
+    if page_store is not None:
+        fingerprint = page_fingerprint(page_text, models[current_provider()]["summary"], headlines)
+        previous = page_store.page(identifier, max_age=page_max_age)
+        if previous is not None and previous[0] == fingerprint:
+            print(f"⏭️ {identifier}: Kennzahlen und News unverändert, Analyse vom letzten Lauf übernommen")
+            tracer.count("summarize.unchanged")
+            record(identifier, "llm", UNCHANGED, 0.0, result=previous[1])
+            return previous[1]
+
+    started = time.perf_counter()
+    result = complete_summary(user_prompt, on_delta)
+    failed = is_error(result)
+    record(identifier, "llm", "error" if failed else "ok", time.perf_counter() - started,
+           result=result, error=result.rsplit("\n\n", 1)[-1] if failed else None)
+    if fingerprint is not None and not failed:
+        page_store.set_page(identifier, fingerprint, result)
+    return result
+
+def ask(task, messages, on_delta=None):
+    """LLM-Aufruf über den gemeinsamen Client; Fehler werden wie bisher als Text zurückgegeben.
+
+    Mit `on_delta` wird die Antwort gestreamt und jedes Stück sofort weitergereicht
+    (Hedging setzt eine vollständige Antwort voraus und läuft daher ohne Streaming).
+    """
+    provider = current_provider()
+    candidates = [(provider, models[provider][task])] + fallbacks
+    parts = []
+    try:
+        if on_delta is None or hedge_after is not None:
+            _, _, result = llm_client.complete_with_fallback(candidates, messages, hedge_after=hedge_after)
+            return result
+        for delta in llm_client.stream_with_fallback(candidates, messages):
+            parts.append(delta)
+            on_delta(delta)
+        return "".join(parts)
+    except Exception as e:
+        error = f"[Fehler {error_labels[provider]}: {e}]"
+        # Bereits gestreamten Text nicht verwerfen
+        return f"{''.join(parts)}\n\n{error}" if parts else error
+
+def complete_summary(user_prompt, on_delta=None):
+    return ask("summary", messages_for(user_prompt), on_delta)
+
+def html_page(title, sections):
     html = [
         "<html><head><meta charset='UTF-8'>",
         f"<title>{title}</title>",
@@ -155,75 +249,302 @@ def generate_html(title, sections, path):
     ]
     html.extend(sections)
     html.append("<div style='margin-bottom: 150px;'></div></body></html>")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("\n".join(html))
+    return "\n".join(html)
+
+def write_html(path, html):
+    # Atomar ersetzen, damit ein Browser nie eine halb geschriebene Datei sieht
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, path)
+
+def generate_html(title, sections, path):
+    with tracer.span("generate_html", path=path, sections=len(sections)):
+        write_html(path, html_page(title, sections))
     print(f"✅ {path}")
 
-overview_sections = []
-for identifier in tickers:
-    result = summarize(identifier)
+def section_for(heading, result):
     html_result = result.replace("\n", "<br>")
-    overview_sections.append(f"<h2>{identifier}</h2>")
-    overview_sections.append(f"<div>{html_result}</div>")
+    sections = [f"<h2>{heading}</h2>"] if heading else []
+    sections.append(f"<div>{html_result}</div>")
+    return sections
+
+class IncrementalReport:
+    """HTML-Bericht, der während des Laufs fortlaufend auf die Platte geschrieben wird.
+
+    Fertige Abschnitte landen sofort in der Datei, laufende Abschnitte zeigen
+    den bisher gestreamten Text (höchstens alle `flush_interval` Sekunden
+    aktualisiert). Bleibt ein Provider hängen, ist der Rest trotzdem lesbar.
+    """
+
+    pending = "<i>⏳ wird analysiert …</i>"
+
+    def __init__(self, title, path, headings, flush_interval=2.0):
+        self.title = title
+        self.path = path
+        self.headings = list(headings)
+        self.texts = [""] * len(self.headings)
+        self.done = [False] * len(self.headings)
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self.flush()
 
-generate_html("Stock Overview Report", overview_sections, overview_file)
+    def sections(self):
+        sections = []
+        for heading, text, done in zip(self.headings, self.texts, self.done):
+            if not done:
+                text = f"{text}\n{self.pending}" if text else self.pending
+            sections.extend(section_for(heading, text))
+        return sections
 
-def generate_risk_report(input_html="overview.html", output_html="risk_report.html"):
-    with open(input_html, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f, "html.parser")
-        raw_text = soup.get_text(separator="\n", strip=True)
+    def flush(self):
+        with tracer.span("report.flush", path=self.path):
+            write_html(self.path, html_page(self.title, self.sections()))
+        self._last_flush = time.monotonic()
 
-    prompt = (
+    def delta(self, index, text):
+        with self._lock:
+            self.texts[index] += text
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def finish(self, index, result):
+        with self._lock:
+            self.texts[index] = result
+            self.done[index] = True
+            self.flush()
+
+    def preload(self, results):
+        """Übernimmt bereits fertige Abschnitte (index → Text) mit einem Schreibvorgang."""
+        with self._lock:
+            for index, result in results.items():
+                self.texts[index] = result
+                self.done[index] = True
+            self.flush()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+        print(f"✅ {self.path}")
+
+def summarize_all(identifiers, workers=None, report=None, done=None, record=no_record):
+    """Verarbeitet alle Ticker parallel; die Ergebnisse bleiben in Eingabereihenfolge.
+
+    Mit `report` wird jede Antwort gestreamt und der Abschnitt geschrieben,
+    sobald der Ticker fertig ist. Ticker in `done` (identifier → Ergebnis,
+    z. B. aus einem fortgesetzten Lauf) werden ohne Netzwerkzugriff übernommen.
+    """
+    workers = workers or max_workers
+    done = done or {}
+    results = [done.get(identifier) for identifier in identifiers]
+    pending = [index for index, result in enumerate(results) if result is None]
+    if report is not None:
+        report.preload({index: result for index, result in enumerate(results) if result is not None})
+
+    def run(index):
+        identifier = identifiers[index]
+        if report is None:
+            return summarize(identifier, record=record)
+        result = summarize(identifier, on_delta=lambda delta: report.delta(index, delta), record=record)
+        report.finish(index, result)
+        return result
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+            for index, result in zip(pending, pool.map(run_in_context(run), pending)):
+                results[index] = result
+        if use_key_figures:
+            key_figure_store.save()
+    return results
+
+def risk_prompt(weights_text, details, analytics_text=None):
+    # Mit Kennzahlen ersetzen diese die rohe Gewichtungstabelle (enthalten die Gewichte)
+    if analytics_text:
+        weights_section = f"### Quantitative Risikokennzahlen (Gewichte, Volatilität, VaR, Risikobeiträge):\n{analytics_text}"
+    else:
+        weights_section = f"### Gewichtungen im Portfolio:\n{weights_text}"
+    return (
         f"Du agierst in der Rolle von Warren Buffett. Heute ist der {today}. "
         "Du bewertest das Gesamtportfolio basierend auf den folgenden Einzelanalysen.\n"
         "Berücksichtige dabei auch die Gewichtungen der Positionen.\n\n"
         "Erstelle einen Risikobericht in Markdown mit folgenden Punkten:\n"
         "- Überbewertungen\n- Schwache Fundamentaldaten\n- Klumpenrisiken\n"
         "- Zyklische Schwächen\n- Makroökonomische Risiken\n\n"
-        f"### Gewichtungen im Portfolio:\n{weights_text}\n\n"
-        f"### Detailanalysen:\n{raw_text}"
+        f"{weights_section}\n\n"
+        f"### Detailanalysen:\n{details}"
     )
 
-    if use_local:
-        payload = {"model": ollama_model, "prompt": prompt, "stream": False}
-        try:
-            r = requests.post("http://localhost:11434/api/generate", headers={"Content-Type": "application/json"}, data=json.dumps(payload))
-            r.raise_for_status()
-            result = r.json().get("response", "[Fehler: Kein response-Feld]")
-        except Exception as e:
-            result = f"[Fehler vom lokalen Modell: {e}]"
+@traced("risk_report")
+def generate_risk_report(weights_text, input_html="overview.html", output_html="risk_report.html",
+                         analyses=None, hierarchical=False, fan_in=DEFAULT_FAN_IN, workers=None,
+                         analytics_text=None):
+    """Erstellt den Risikobericht aus den Einzelanalysen.
 
-    elif use_openrouter:
-        try:
-            response = openrouter_client.chat.completions.create(
-                model="qwen/qwen3-235b-a22b",
-                messages=[
-                    {"role": "system", "content": "Du agierst in der Rolle von Warren Buffett, ein vorsichtiger Value-Investor."},
-                    {"role": "user", "content": prompt}
-                ],
-                extra_headers={
-                    "HTTP-Referer": "https://deinprojekt.de",
-                    "X-Title": "FinanzanalyseTool"
-                }
-            )
-            result = response.choices[0].message.content
-        except Exception as e:
-            result = f"[Fehler von OpenRouter API: {e}]"
+    Standardmäßig geht der gesamte Text von `input_html` in einen Prompt.
+    Mit `hierarchical` wird jede Analyse zuerst zu einem gecachten Digest
+    verdichtet und baumartig zusammengefasst (siehe risk.py); `analyses`
+    sind dann (Ticker, Analyse)-Paare, sonst werden sie aus `input_html` gelesen.
+    `analytics_text` (siehe analytics.py) ersetzt die Gewichtungstabelle im Prompt.
+    """
+    if hierarchical:
+        reducer = RiskReducer(ask, models[current_provider()]["summary"], fan_in=fan_in,
+                              workers=workers or max_workers)
+        details = reducer.run(analyses if analyses is not None else analyses_from_html(input_html))
+        print(f"Risiko-Digests: {reducer.store.stats()}, LLM-Aufrufe inkl. Cache-Treffer: {reducer.calls}")
+    else:
+        with open(input_html, "rb") as f:
+            details = extract(f.read()).text
+
+    report = IncrementalReport("Risikobericht – Portfolioanalyse", output_html, [None])
+    result = complete_risk_report(risk_prompt(weights_text, details, analytics_text), on_delta=lambda delta: report.delta(0, delta))
+    report.finish(0, result)
+    report.close()
+    return result
+
+def complete_risk_report(prompt, on_delta=None):
+    return ask("risk", [
+        {"role": "system", "content": "Du agierst in der Rolle von Warren Buffett, ein vorsichtiger Value-Investor."},
+        {"role": "user", "content": prompt}
+    ], on_delta)
+
+def configure(local=False, openrouter=False, cache=True, cache_ttl=None, fallback=(), hedge=None):
+    """Provider wählen, API-Keys prüfen und Client samt Antwort-Cache aufsetzen."""
+    global use_local, use_openrouter, llm_cache, llm_client, fallbacks, hedge_after
+    use_local = local
+    use_openrouter = openrouter
+    llm_cache = (LLMCache(enabled=cache, ignore=(PROMPT_DATE,)) if cache_ttl is None
+                 else LLMCache(ttl=cache_ttl, enabled=cache, ignore=(PROMPT_DATE,)))
+    fallbacks = [tuple(item.split(":", 1)) for item in fallback]
+    hedge_after = hedge
 
+    # Umgebungsvariablen laden
+    load_dotenv(override=True)
+    api_key = os.getenv("OPENAI_API_KEY")
+    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+
+    if not use_local and not use_openrouter:
+        if not api_key or not api_key.startswith("sk-proj-"):
+            raise ValueError("Invalid or missing OpenAI API key.")
+
+    if use_openrouter:
+        if not openrouter_api_key:
+            raise ValueError("Fehlender OpenRouter API Key.")
+
+    llm_client = LLMClient(cache=llm_cache)
+
+def analytics_for(df_weights, prices_path, ticker_map_path=ticker_map_file):
+    """Risikokennzahlen für den Prompt; fehlen Kurse oder Zuordnung, geht es ohne sie weiter."""
+    if ticker_map_path == ticker_map_file and not os.path.exists(ticker_map_path):
+        ticker_map_path = None
+    try:
+        return portfolio_analytics_text(df_weights, prices_path, ticker_map_path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Risikokennzahlen übersprungen: {e}")
+        return None
+
+def load_weights(path=weights_file):
+    # Geparst wird nur, wenn sich die Datei geändert hat (siehe weights.py)
+    return read_weights(path, cache=weights_cache)
+
+def render_from_store(store, run_id=None):
+    """Erzeugt overview.html (und risk_report.html) aus einem gespeicherten Lauf, ohne Netzwerk."""
+    run_id = run_id or store.latest_run()
+    if run_id is None:
+        raise ValueError(f"Keine gespeicherten Läufe in {store.path}.")
+    sections = []
+    for item in store.items(run_id):
+        sections.extend(section_for(item["identifier"], item["result"] or IncrementalReport.pending))
+    generate_html("Stock Overview Report", sections, overview_file)
+    risk_report = store.risk_report(run_id)
+    if risk_report:
+        generate_html("Risikobericht – Portfolioanalyse", section_for(None, risk_report), risk_file)
+    print(f"Lauf {run_id}: {store.summary(run_id)}")
+
+def main():
+    global page_store, page_max_age, use_key_figures
+    # Argumente parsen
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--local", action="store_true")
+    parser.add_argument("--openrouter", action="store_true")
+    parser.add_argument("--workers", type=int, default=max_workers)
+    parser.add_argument("--no-cache", action="store_true", help="LLM-Antworten nicht aus dem Cache lesen/schreiben")
+    parser.add_argument("--cache-ttl", type=float, help="Gültigkeit gecachter Antworten in Stunden")
+    parser.add_argument("--fallback", action="append", default=[], metavar="PROVIDER:MODEL",
+                        help="Ausweichmodell, z. B. openrouter:openai/gpt-4o-mini (mehrfach möglich)")
+    parser.add_argument("--hedge-after", type=float,
+                        help="Sekunden, nach denen parallel das nächste Ausweichmodell gestartet wird")
+    parser.add_argument("--hierarchical", action="store_true",
+                        help="Risikobericht per Map-Reduce über gecachte Digests je Position")
+    parser.add_argument("--fan-in", type=int, default=DEFAULT_FAN_IN,
+                        help="Digests pro Zusammenfassung im hierarchischen Modus")
+    parser.add_argument("--prices", help="Kursdatei aus volantility/extract.py für die Risikokennzahlen")
+    parser.add_argument("--ticker-map", default=ticker_map_file,
+                        help="CSV mit den Spalten ISIN und Ticker (falls weights.csv keine Ticker-Spalte hat)")
+    parser.add_argument("--state", default=run_state_file, help="SQLite-Datei mit dem Zustand der Läufe")
+    parser.add_argument("--resume", action="store_true",
+                        help="Letzten Lauf fortsetzen: nur fehlgeschlagene oder fehlende Ticker neu bearbeiten")
+    parser.add_argument("--render-only", action="store_true",
+                        help="Berichte nur aus dem gespeicherten Lauf neu erzeugen (ohne Netzwerk)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="LLM nur für Seiten mit geänderten Kennzahlen, Risikobericht nur bei geänderten Eingaben")
+    parser.add_argument("--max-age", type=float, default=page_max_age / 86400,
+                        help="Tage, nach denen --incremental eine Seite auch unverändert neu analysiert")
+    parser.add_argument("--raw-text", action="store_true",
+                        help="Ganzen Seitentext statt der extrahierten Kennzahlen an das LLM senden")
+    parser.add_argument("--trace", metavar="DATEI",
+                        help="Spans als JSON (bzw. OTLP bei *.otlp.json) schreiben und Zeitübersicht ausgeben")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.enable(args.trace)
+
+    store = RunStore(args.state)
+    if args.render_only:
+        render_from_store(store)
+        return
+    if args.incremental:
+        page_store = store
+        page_max_age = args.max_age * 86400
+    use_key_figures = not args.raw_text
+
+    cache_ttl = args.cache_ttl * 3600 if args.cache_ttl is not None else None
+    configure(local=args.local, openrouter=args.openrouter, cache=not args.no_cache, cache_ttl=cache_ttl,
+              fallback=args.fallback, hedge=args.hedge_after)
+
+    # Gewichtungen laden
+    df_weights = load_weights()
+    weights_text = df_weights.to_markdown(index=False)
+    analytics_text = analytics_for(df_weights, args.prices, args.ticker_map) if args.prices else None
+
+    if args.resume:
+        run_id = store.resume_run(tickers)
+        done = store.completed(run_id)
+        print(f"Lauf {run_id} wird fortgesetzt: {len(done)} von {len(tickers)} Tickern bereits fertig")
     else:
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "Du agierst in der Rolle von Warren Buffett, ein vorsichtiger Value-Investor."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            result = response.choices[0].message.content
-        except Exception as e:
-            result = f"[Fehler von OpenAI API: {e}]"
+        run_id = store.start_run(tickers, vars(args))
+        done = {}
 
-    html_result = result.replace("\n", "<br>")
-    generate_html("Risikobericht – Portfolioanalyse", [f"<div>{html_result}</div>"], output_html)
+    report = IncrementalReport("Stock Overview Report", overview_file, tickers)
+    results = summarize_all(tickers, workers=args.workers, report=report, done=done, record=store.recorder(run_id))
+    report.close()
+
+    # Der Bericht hängt nur von den Abschnitten, den Gewichtungen und den Optionen ab
+    risk_inputs = inputs_hash(results, file_hash(weights_file), analytics_text, args.hierarchical,
+                              args.fan_in, models[current_provider()]["risk"])
+    risk_report = store.previous_risk_report(risk_inputs) if args.incremental else None
+    if risk_report is not None:
+        print("⏭️ Abschnitte und Gewichtungen unverändert: Risikobericht vom letzten Lauf übernommen")
+        generate_html("Risikobericht – Portfolioanalyse", section_for(None, risk_report), risk_file)
+    else:
+        risk_report = generate_risk_report(weights_text, overview_file, risk_file, analyses=list(zip(tickers, results)),
+                                           hierarchical=args.hierarchical, fan_in=args.fan_in, workers=args.workers,
+                                           analytics_text=analytics_text)
+    if not is_error(risk_report):
+        store.set_risk_report(run_id, risk_report, risk_inputs)
+    print(f"Lauf {run_id}: {store.finish_run(run_id)}, {store.summary(run_id)}")
+    print(f"LLM-Cache: {llm_cache.stats()}")
+    if use_key_figures:
+        print(f"Kennzahlen-Cache: {key_figure_store.stats()}")
 
-generate_risk_report()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import csv
+import hashlib
+import itertools
+
+import pandas as pd
+
+# Geparste Gewichtungen liegen neben den übrigen Caches im Repo-Verzeichnis .cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "weights")
+DEFAULT_CHUNKSIZE = 10_000
+SAMPLE_LINES = 200
+
+WEIGHT_NAMES = ("gewicht", "weight", "anteil")
+KEY_NAMES = ("isin", "ticker", "symbol", "wertpapier", "name")
+
+
+class Schema:
+    """Ergebnis der einmaligen Prüfung: Trennzeichen, Dezimalformat und Spaltenrollen."""
+
+    def __init__(self, delimiter, quotechar, columns, weight_col, key_col, decimal, thousands):
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.columns = columns
+        self.weight_col = weight_col
+        self.key_col = key_col
+        self.decimal = decimal
+        self.thousands = thousands
+
+
+def find_column(columns, candidates):
+    for candidate in candidates:
+        for col in columns:
+            if candidate in col.lower():
+                return col
+    return None
+
+
+def detect_decimal(values):
+    """Erkennt Dezimal- und Tausendertrennzeichen anhand von Beispielwerten."""
+    values = [v.strip() for v in values if v and v.strip()]
+    if any("," in v and "." in v for v in values):
+        # 1.234,5 (deutsch) oder 1,234.5 (englisch): das letzte Zeichen ist der Dezimaltrenner
+        sample = next(v for v in values if "," in v and "." in v)
+        return (",", ".") if sample.rfind(",") > sample.rfind(".") else (".", ",")
+    if any("," in v for v in values):
+        return ",", None
+    return ".", None
+
+
+def read_schema(path):
+    """Liest Kopfzeile und die ersten Zeilen, prüft das Schema und erkennt das Format."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        lines = list(itertools.islice(f, SAMPLE_LINES))
+    if not lines:
+        raise ValueError(f"{path}: Datei ist leer.")
+    try:
+        dialect = csv.Sniffer().sniff("".join(lines), delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    rows = list(csv.reader(lines, dialect))
+    columns = [col.strip() for col in rows[0]]
+
+    weight_col = find_column(columns, WEIGHT_NAMES)
+    key_col = find_column(columns, KEY_NAMES)
+    if weight_col is None:
+        raise ValueError(f"{path}: keine Gewichtungsspalte gefunden (erwartet z. B. 'Gewichtung in %'), "
+                         f"Spalten: {columns}")
+    if key_col is None:
+        raise ValueError(f"{path}: keine Spalte ISIN/Ticker/Wertpapier gefunden, Spalten: {columns}")
+
+    index = columns.index(weight_col)
+    decimal, thousands = detect_decimal(row[index] for row in rows[1:] if len(row) > index)
+    return Schema(dialect.delimiter, dialect.quotechar or '"', columns, weight_col, key_col, decimal, thousands)
+
+
+def parse_chunks(path, schema, chunksize=DEFAULT_CHUNKSIZE):
+    """Liest die Datei blockweise; Gewichte werden direkt als float geparst."""
+    reader = pd.read_csv(
+        path, sep=schema.delimiter, quotechar=schema.quotechar, header=0, names=schema.columns,
+        decimal=schema.decimal, thousands=schema.thousands, chunksize=chunksize,
+        dtype={col: "string" for col in schema.columns if col != schema.weight_col},
+        skipinitialspace=True, encoding="utf-8-sig",
+    )
+    for chunk in reader:
+        weights = pd.to_numeric(chunk[schema.weight_col], errors="coerce")
+        invalid = weights.isna() & chunk[schema.weight_col].notna()
+        if invalid.any():
+            row = chunk.index[invalid][0] + 2  # Kopfzeile + 1-basiert
+            raise ValueError(f"{path}, Zeile {row}: ungültiges Gewicht {chunk[schema.weight_col][invalid].iloc[0]!r}")
+        chunk[schema.weight_col] = weights.fillna(0.0).astype("float64")
+        text = [col for col in schema.columns if col != schema.weight_col]
+        chunk[text] = chunk[text].fillna("")
+        yield chunk
+
+
+def aggregate(frame, schema):
+    # Zeilen ohne Schlüssel werden nicht zusammengefasst
+    key = frame[schema.key_col].str.strip()
+    key = key.where(key != "", "#" + frame.index.astype(str))
+    rules = {col: ("sum" if col == schema.weight_col else "first") for col in schema.columns}
+    return frame.groupby(key.rename(None), sort=False).agg(rules)
+
+
+def parse_weights(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Parst die Datei und fasst mehrfach vorkommende Positionen (mehrere Depots) zusammen."""
+    schema = read_schema(path)
+    parts = [aggregate(chunk, schema) for chunk in parse_chunks(path, schema, chunksize)]
+    combined = parts[0] if len(parts) == 1 else pd.concat(parts)
+    if len(parts) > 1:
+        rules = {col: ("sum" if col == schema.weight_col else "first") for col in schema.columns}
+        combined = combined.groupby(level=0, sort=False).agg(rules)
+    return combined.reset_index(drop=True)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class WeightsCache:
+    """Geparste Gewichtungen pro Datei, gültig solange sich der Inhalt nicht ändert.
+
+    Zuerst werden mtime und Größe verglichen (kein Lesen der Datei); nur wenn
+    sie abweichen, entscheidet der SHA-256 des Inhalts.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, path):
+        name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def load(self, path, chunksize=DEFAULT_CHUNKSIZE):
+        stat = os.stat(path)
+        cache_path = self._path(path)
+        try:
+            entry = pd.read_pickle(cache_path)
+        except (FileNotFoundError, EOFError, ValueError):
+            entry = None
+
+        if entry is not None:
+            if (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                self.hits += 1
+                return entry["weights"].copy()
+            digest = file_hash(path)
+            if entry["sha256"] == digest:
+                self.hits += 1
+                self._store(cache_path, entry["weights"], stat, digest)
+                return entry["weights"].copy()
+        else:
+            digest = file_hash(path)
+
+        self.misses += 1
+        weights = parse_weights(path, chunksize)
+        self._store(cache_path, weights, stat, digest)
+        return weights
+
+    def _store(self, cache_path, weights, stat, digest):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{cache_path}.tmp"
+        pd.to_pickle({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest, "weights": weights}, tmp)
+        os.replace(tmp, cache_path)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def load_weights(path, cache=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Lädt eine Gewichtungsdatei (Spaltennamen wie in der Datei, Gewichte als float).
+
+    Ohne `cache` wird immer neu geparst.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{os.path.basename(path)} nicht gefunden.")
+    if cache is None:
+        return parse_weights(path, chunksize)
+    return cache.load(path, chunksize)
@@ -0,0 +1,79 @@
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "summarizer"))
+from common.html_text import extract
+from fingerprint import page_fingerprint
+from keyfigures import extract_key_figures, fingerprint_text
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "finviz_quote.html")
+MODEL = "gpt-4o-mini"
+
+# Kurs und kursabhängige Felder am nächsten Handelstag
+NEXT_DAY = {
+    "Price": "231.40", "Prev Close": "228.71", "Change": "1.18%", "Volume": "51,203,117",
+    "Perf Week": "2.41%", "Perf Month": "6.02%", "Perf Quarter": "10.35%", "Perf Half Y": "13.10%",
+    "Perf Year": "9.02%", "Perf YTD": "-7.53%", "SMA20": "5.51%", "SMA50": "9.20%", "SMA200": "5.94%",
+    "52W High": "-11.03%", "52W Low": "36.75%", "52W Range": "169.21 - 260.10",
+    "Market Cap": "3467.57B", "P/E": "35.11", "Forward P/E": "28.82", "PEG": "2.69", "P/S": "8.49",
+    "P/B": "52.12", "P/C": "63.40", "P/FCF": "35.70", "Beta": "1.21",
+    "Dividend Est.": "1.04 (0.44%)", "Dividend TTM": "1.02 (0.44%)",
+    "RSI (14)": "63.88", "ATR (14)": "4.91", "Rel Volume": "0.97", "Avg Volume": "53.10M",
+}
+
+
+def _page(values, headlines="Headline number"):
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    for label, value in values.items():
+        html = re.sub(rf"(>{re.escape(label)}</td><td[^>]*><b>)[^<]*", lambda m: m.group(1) + value, html)
+    if "Price" in values:
+        html = html.replace("228.71<", values["Price"] + "<")
+    return html.replace("Headline number", headlines).replace("Aug-0", "Sep-0").encode("utf-8")
+
+
+def _raw(content):
+    return extract(content).text
+
+
+def _figures(content):
+    return fingerprint_text(extract_key_figures(content))
+
+
+@pytest.mark.parametrize("text", [_raw, _figures])
+def test_next_day_with_same_fundamentals_hashes_equal(text):
+    today = _page({})
+    tomorrow = _page(NEXT_DAY, headlines="Breaking story")
+    assert text(today) != text(tomorrow)
+    assert page_fingerprint(text(today), MODEL) == page_fingerprint(text(tomorrow), MODEL)
+
+
+@pytest.mark.parametrize("text", [_raw, _figures])
+def test_large_price_move_changes_the_hash(text):
+    today = _page({})
+    crash = _page({**NEXT_DAY, "Price": "171.50", "P/E": "26.02", "Market Cap": "2570.11B"})
+    assert page_fingerprint(text(today), MODEL) != page_fingerprint(text(crash), MODEL)
+
+
+@pytest.mark.parametrize("text", [_raw, _figures])
+def test_changed_fundamentals_change_the_hash(text):
+    today = _page({})
+    reported = _page({**NEXT_DAY, "EPS (ttm)": "6.97", "Sales": "416.16B"})
+    assert page_fingerprint(text(today), MODEL) != page_fingerprint(text(reported), MODEL)
+
+
+def test_new_headline_changes_the_hash():
+    today = extract_key_figures(_page({}))
+    tomorrow = extract_key_figures(_page(NEXT_DAY))
+    news = extract_key_figures(_page(NEXT_DAY, headlines="Apple raises guidance"))
+
+    def fingerprint(record):
+        return page_fingerprint(fingerprint_text(record), MODEL, record.news)
+
+    assert fingerprint(today) == fingerprint(tomorrow)
+    assert fingerprint(today) != fingerprint(news)
@@ -0,0 +1,45 @@
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.llm import LLMClient, Provider
+from common.llm_cache import LLMCache
+
+PROMPT_DATE = re.compile(r"Heute ist der \d{4}-\d{2}-\d{2}\. ")
+
+
+class StubProvider(Provider):
+    def __init__(self, chunks):
+        super().__init__("stub", "http://stub.invalid")
+        self.chunks = chunks
+        self.calls = 0
+
+    def stream_request(self, model, messages, params):
+        self.calls += 1
+        yield from self.chunks
+
+
+def _messages(day):
+    return [{"role": "system", "content": f"Heute ist der {day}. Analysiere."}, {"role": "user", "content": "AAPL"}]
+
+
+def test_date_is_left_out_of_the_key(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), ignore=(PROMPT_DATE,))
+    cache.set("stub", "m", _messages("2026-10-19"), "Analyse")
+    assert cache.get("stub", "m", _messages("2026-10-20")) == "Analyse"
+    assert cache.get("stub", "m", _messages("2026-10-20") + [{"role": "user", "content": "MSFT"}]) is None
+
+
+def test_empty_stream_is_not_cached(tmp_path):
+    provider = StubProvider([])
+    client = LLMClient(providers={"stub": provider}, cache=LLMCache(str(tmp_path / "cache.sqlite")))
+    assert list(client.stream("stub", "m", _messages("2026-10-19"))) == []
+    assert list(client.stream("stub", "m", _messages("2026-10-19"))) == []
+    assert provider.calls == 2
+
+    provider.chunks = ["Ana", "lyse"]
+    assert "".join(client.stream("stub", "m", _messages("2026-10-19"))) == "Analyse"
+    assert list(client.stream("stub", "m", _messages("2026-10-19"))) == ["Analyse"]
+    assert provider.calls == 3
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "volantility"))
+import cache
+from cache import OHLCVCache
+
+
+def _downloader(calls):
+    def fetch_stock_data(tickers, start_date, end_date, interval, **_):
+        calls.append((start_date, end_date))
+        dates = pd.bdate_range(start_date, end_date, inclusive="left", name="Date")
+        # Weihnachten: keine Kurse zwischen dem 24. und 26.12.
+        dates = dates[(dates < "2024-12-24") | (dates > "2024-12-26")]
+        if dates.empty:
+            return {}, {ticker: "no data returned" for ticker in tickers}
+        frame = pd.DataFrame({"Close": range(len(dates))}, index=dates, dtype=float)
+        return {ticker: frame for ticker in tickers}, {}
+    return fetch_stock_data
+
+
+def test_empty_holiday_gap_is_covered_once(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(cache, "fetch_stock_data", _downloader(calls))
+    ohlcv = OHLCVCache(str(tmp_path))
+
+    ohlcv.fetch_stock_data(["AAA"], "2024-12-02", "2024-12-24", "1d")
+    data, errors = ohlcv.fetch_stock_data(["AAA"], "2024-12-02", "2024-12-27", "1d")
+    assert errors == {}
+    assert len(data["AAA"]) == 16
+    assert calls[-1] == ("2024-12-24", "2024-12-27")
+
+    # Auch ein neuer Prozess lädt die Feiertagslücke nicht erneut
+    calls.clear()
+    data, errors = OHLCVCache(str(tmp_path)).fetch_stock_data(["AAA"], "2024-12-02", "2024-12-27", "1d")
+    assert (calls, errors, len(data["AAA"])) == ([], {}, 16)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "volantility"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from extract import FORMATS, normalize_price_types
+from stubs import synthetic_prices
+from writers import write_prices
+
+
+@pytest.mark.parametrize("price_types, expected", [
+    # Vorschlag der interaktiven Eingabe
+    ("Open High Low Close Adj Close".split(), ["Open", "High", "Low", "Close", "Adj Close"]),
+    # Beispiel aus der README (--price-types Close Adj Close)
+    (["Close", "Adj", "Close"], ["Close", "Adj Close"]),
+    (["adj", "close"], ["Adj Close"]),
+    (["Adj Close", "close"], ["Adj Close", "Close"]),
+    (["Adj"], ["Adj Close"]),
+])
+def test_normalize_price_types(price_types, expected):
+    assert normalize_price_types(price_types) == expected
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_write_prices_with_suggested_input(tmp_path, fmt):
+    prices = synthetic_prices(["AAA", "BBB"], days=10)
+    prices.columns.names = ["Ticker", "Price"]
+    columns = normalize_price_types("Open High Low Close Adj Close".split())
+    selected = prices.loc[:, prices.columns.get_level_values("Price").isin(columns)]
+
+    path, rows = write_prices(selected, ["AAA", "BBB"], columns, fmt, str(tmp_path), "prices")
+
+    assert rows == 20
+    assert os.path.exists(path)
+    if fmt == "parquet":
+        assert list(pd.read_parquet(path).columns) == ["Date", "Ticker"] + columns
@@ -0,0 +1,17 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "summarizer"))
+from runstate import RunStore
+
+
+def test_page_expires_after_max_age(tmp_path):
+    store = RunStore(str(tmp_path / "run_state.sqlite"))
+    store.set_page("AAPL", "abc", "Analyse")
+    assert store.page("AAPL", max_age=86400) == ("abc", "Analyse")
+
+    store._execute("UPDATE pages SET updated = ? WHERE identifier = ?", (time.time() - 8 * 86400, "AAPL"))
+    assert store.page("AAPL", max_age=7 * 86400) is None
+    assert store.page("AAPL") == ("abc", "Analyse")
@@ -0,0 +1,237 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import date
+
+import pandas as pd
+
+from fetch import fetch_stock_data
+
+# Standardwerte für den lokalen Kurs-Cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILE = "index.json"
+# Nachlade-Lücken bis zu dieser Zahl an Werktagen dürfen leer bleiben (Feiertage)
+HOLIDAY_GAP_DAYS = 3
+
+
+def _to_date(value):
+    return pd.Timestamp(value).date()
+
+
+def _business_days(start, end):
+    """Werktage in [start, end); 0 bei Lücken, die nur aus Wochenenden bestehen."""
+    return len(pd.bdate_range(start, end, inclusive="left"))
+
+
+def _naive_dates(index):
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+class OHLCVCache:
+    """Parquet-Cache pro (Ticker, Intervall) mit inkrementellem Nachladen.
+
+    Für jeden Schlüssel merkt sich der Index den lückenlos abgedeckten
+    Zeitraum [start, end). Bei einer Anfrage werden nur die fehlenden
+    Ränder nachgeladen, alles andere kommt von der Platte.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    # --- Index -----------------------------------------------------------
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        # Einträge ohne Datei verwerfen (z. B. manuell gelöscht)
+        return {key: entry for key, entry in index.items()
+                if os.path.exists(os.path.join(self.cache_dir, entry["file"]))}
+
+    def _save_index(self):
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self._index_path())
+
+    @staticmethod
+    def key(ticker, interval):
+        return f"{ticker}|{interval}"
+
+    @staticmethod
+    def file_name(ticker, interval):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        digest = hashlib.sha1(ticker.encode("utf-8")).hexdigest()[:8]
+        return f"{safe}_{interval}_{digest}.parquet"
+
+    # --- Lesen/Schreiben -------------------------------------------------
+
+    def _read(self, entry):
+        return pd.read_parquet(os.path.join(self.cache_dir, entry["file"]))
+
+    def _write(self, ticker, interval, frame, start, end):
+        name = self.file_name(ticker, interval)
+        path = os.path.join(self.cache_dir, name)
+        tmp = path + ".tmp"
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+        self._index[self.key(ticker, interval)] = {
+            "file": name,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "size": os.path.getsize(path),
+            "last_access": time.time(),
+        }
+
+    def _missing_ranges(self, entry, start, end):
+        """Fehlende Ränder der Anfrage relativ zum abgedeckten Zeitraum."""
+        if entry is None:
+            return [(start, end)]
+        cov_start, cov_end = _to_date(entry["start"]), _to_date(entry["end"])
+        missing = []
+        if start < cov_start:
+            missing.append((start, cov_start))
+        if end > cov_end:
+            missing.append((cov_end, end))
+        return missing
+
+    @staticmethod
+    def _extend(entry, rng, covered_end):
+        """Erweitert den abgedeckten Zeitraum um eine Lücke ohne Handelstage."""
+        gap_start, gap_end = rng
+        entry["start"] = min(gap_start, _to_date(entry["start"])).isoformat()
+        entry["end"] = max(min(gap_end, covered_end), _to_date(entry["end"])).isoformat()
+
+    def evict(self, keep=()):
+        """LRU-Verdrängung, bis die Gesamtgröße unter max_bytes liegt."""
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+            self.evictions += 1
+
+    # --- Öffentliche API -------------------------------------------------
+
+    def fetch_stock_data(self, tickers, start_date, end_date, interval, **fetch_kwargs):
+        """Wie fetch.fetch_stock_data, aber mit Platten-Cache davor."""
+        start, end = _to_date(start_date), _to_date(end_date)
+        # Heute ist noch nicht abgeschlossen und wird daher nie als abgedeckt markiert
+        covered_end = min(end, date.today())
+        tickers = list(dict.fromkeys(tickers))
+
+        with self._lock:
+            cached, missing = {}, {}
+            for ticker in tickers:
+                entry = self._index.get(self.key(ticker, interval))
+                ranges = self._missing_ranges(entry, start, end)
+                if entry is not None:
+                    cached[ticker] = self._read(entry)
+                if not ranges:
+                    self.hits += 1
+                elif entry is None:
+                    self.misses += 1
+                else:
+                    self.partial_hits += 1
+                for rng in ranges:
+                    # Reine Wochenend-Lücken nicht anfragen, sie gelten direkt als abgedeckt
+                    if _business_days(*rng) == 0:
+                        if entry is not None:
+                            self._extend(entry, rng, covered_end)
+                        continue
+                    missing.setdefault(rng, []).append(ticker)
+
+            # Ticker mit identischer Lücke gemeinsam nachladen
+            errors = {}
+            fresh = {}
+            for (gap_start, gap_end), gap_tickers in missing.items():
+                data, gap_errors = fetch_stock_data(gap_tickers, gap_start.isoformat(),
+                                                    gap_end.isoformat(), interval, **fetch_kwargs)
+                if _business_days(gap_start, gap_end) <= HOLIDAY_GAP_DAYS:
+                    # Kurze Nachlade-Lücke ohne Kurse (Feiertag): kein Fehler für bereits gecachte Ticker,
+                    # und die Lücke gilt als abgedeckt, damit sie nicht bei jedem Lauf erneut geladen wird
+                    holidays = [ticker for ticker, error in gap_errors.items()
+                                if ticker in cached and error == "no data returned"]
+                    for ticker in holidays:
+                        self._extend(self._index[self.key(ticker, interval)], (gap_start, gap_end), covered_end)
+                        del gap_errors[ticker]
+                errors.update(gap_errors)
+                for ticker, frame in data.items():
+                    fresh.setdefault(ticker, []).append(frame)
+
+            touched = set()
+            for ticker in tickers:
+                key = self.key(ticker, interval)
+                entry = self._index.get(key)
+                if ticker in fresh and ticker not in errors:
+                    parts = ([cached[ticker]] if ticker in cached else []) + fresh[ticker]
+                    merged = pd.concat(parts)
+                    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                    new_start = min(start, _to_date(entry["start"])) if entry else start
+                    new_end = max(covered_end, _to_date(entry["end"])) if entry else covered_end
+                    self._write(ticker, interval, merged, new_start, new_end)
+                    cached[ticker] = merged
+                    touched.add(key)
+                elif entry is not None:
+                    entry["last_access"] = time.time()
+                    touched.add(key)
+
+            self.evict(keep=touched)
+            self._save_index()
+
+        result = {}
+        for ticker in tickers:
+            if ticker not in cached:
+                continue
+            frame = cached[ticker]
+            dates = _naive_dates(frame.index)
+            mask = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))
+            if mask.any():
+                result[ticker] = frame[mask]
+        return result, errors
+
+    def get_stock_data(self, tickers, start_date, end_date, interval, **fetch_kwargs):
+        data, errors = self.fetch_stock_data(tickers, start_date, end_date, interval, **fetch_kwargs)
+        for ticker, error in errors.items():
+            print(f"Error for {ticker}: {error}")
+        return pd.concat(data, axis=1) if data else pd.DataFrame()
+
+    def stats(self):
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": sum(entry["size"] for entry in self._index.values()),
+        }
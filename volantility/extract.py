@@ -1,123 +1,258 @@
-import yfinance as yf
-import pandas as pd
+"""Kursdaten laden, exportieren und Volatilität visualisieren.
+
+Als Skript:
+    python extract.py --tickers AMD NVDA --start 01.01.2024 --end 31.12.2024
+    python extract.py --config job.json
+    python extract.py --batch jobs.json
+    python extract.py               # interaktiv wie bisher
+
+Als Bibliothek:
+    from extract import run, get_stock_data
+
+Schwere Abhängigkeiten (pandas, yfinance, matplotlib) werden erst geladen,
+wenn sie tatsächlich gebraucht werden; matplotlib nur beim Plotten.
+"""
 import os
+import sys
+import json
+import argparse
 from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
 
-def get_stock_data(tickers, start_date, end_date, timeframe):
-    data = {}
-    for ticker in tickers:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import tracer
+
+DEFAULT_OUTPUT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+# Spiegeln writers.WRITERS und volatility.ESTIMATORS, damit --help ohne
+# pandas/numpy auskommt
+TIMEFRAMES = {"daily": "1d", "weekly": "1wk", "monthly": "1mo"}
+FORMATS = ("parquet", "feather", "csv.gz", "xlsx")
+ESTIMATORS = ("close", "ewma", "parkinson", "garman_klass", "yang_zhang")
+
+DEFAULTS = {
+    "tickers": [],
+    "start": None,
+    "end": None,
+    "timeframe": "daily",
+    "price_types": ["Close"],
+    "estimator": "close",
+    "output_folder": DEFAULT_OUTPUT_FOLDER,
+    "output_format": "parquet",
+    "output_name": "Historical_ITPM_Prices",
+    "plots": True,
+    "sheet": False,
+    "workers": None,
+    "cache_dir": None,
+}
+
+# Öffentliche Namen, die erst beim ersten Zugriff importiert werden
+_LAZY = {
+    "get_stock_data": ("fetch", "get_stock_data"),
+    "fetch_stock_data": ("fetch", "fetch_stock_data"),
+    "OHLCVCache": ("cache", "OHLCVCache"),
+    "compute_volatility": ("volatility", "compute_volatility"),
+    "render_charts": ("render", "render_charts"),
+    "write_prices": ("writers", "write_prices"),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        module_name, attr = _LAZY[name]
+        value = getattr(importlib.import_module(module_name), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_date(value):
+    """Akzeptiert DD.MM.YYYY oder YYYY-MM-DD und liefert YYYY-MM-DD."""
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
         try:
-            ticker_data = yf.download(ticker, start=start_date, end=end_date, interval=timeframe)
-            print(f"Available columns for {ticker}: {ticker_data.columns}")
-            data[ticker] = ticker_data  # Alle Spalten für die Verarbeitung beibehalten
-        except Exception as e:
-            print(f"Error for {ticker}: {e}")
-    return pd.concat(data, axis=1) if data else pd.DataFrame()
-
-# Benutzereingaben
-start_date_input = input("Enter start date (DD.MM.YYYY): ")
-end_date_input = input("Enter end date (DD.MM.YYYY): ")
-timeframe_input = input("Enter timeframe (daily, weekly, monthly): ").lower()
-tickers = input("Enter ticker symbols (space-separated): ").split()
-price_types = input("Enter price types (Open High Low Close Adj Close): ").split()
-
-# Daten in erforderliches Format konvertieren
-start_date = datetime.strptime(start_date_input, "%d.%m.%Y").strftime("%Y-%m-%d")
-end_date = datetime.strptime(end_date_input, "%d.%m.%Y").strftime("%Y-%m-%d")
-
-# Timeframe-Zuordnung
-timeframe_map = {"daily": "1d", "weekly": "1wk", "monthly": "1mo"}
-interval = timeframe_map.get(timeframe_input, "1d")
-
-# Preisarten formatieren
-price_types = [p.capitalize() for p in price_types]
-if "Adj" in price_types:
-    price_types[price_types.index("Adj")] = "Adj Close"
-
-
-# Daten abrufen
-df = get_stock_data(tickers, start_date, end_date, interval)
-
-# Falls mehrere Ticker abgefragt wurden, besitzt der DataFrame eine
-# MultiIndex-Spalte ohne Namen.  Wir benennen die Ebenen, damit die
-# spaetere Auswahl nach Preistyp funktioniert.
-if isinstance(df.columns, pd.MultiIndex):
-    df.columns.names = ["Ticker", "Price"]
-
-if not df.empty:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value} (expected DD.MM.YYYY or YYYY-MM-DD)")
+
+
+def normalize_price_types(price_types):
+    # "Adj Close" kommt bei space-separierter Eingabe als "Adj" "Close" an
+    result = []
+    for price_type in (" ".join(p.split()).title() for p in price_types):
+        if price_type == "Close" and result and result[-1] == "Adj":
+            result[-1] = "Adj Close"
+        else:
+            result.append(price_type)
+    return list(dict.fromkeys("Adj Close" if p == "Adj" else p for p in result))
+
+
+def run(tickers, start, end, timeframe="daily", price_types=("Close",), estimator="close",
+        output_folder=DEFAULT_OUTPUT_FOLDER, output_format="parquet",
+        output_name="Historical_ITPM_Prices", plots=True, sheet=False, workers=None,
+        cache=None, cache_dir=None):
+    """Lädt die Kurse, schreibt die Ausgabedatei und erzeugt die Charts.
+
+    `cache` kann zwischen mehreren Aufrufen wiederverwendet werden (Batch-Modus).
+    Gibt ein Dict mit Ausgabedatei, Zeilenzahl, Preis-/Volatilitäts-DataFrames
+    und Renderzeiten zurück, oder None, wenn keine Daten geladen wurden.
+    """
+    import pandas as pd
+    from cache import OHLCVCache
+    from volatility import compute_volatility
+    from writers import write_prices
+
+    start_date, end_date = parse_date(start), parse_date(end)
+    interval = TIMEFRAMES.get(timeframe, timeframe if timeframe in TIMEFRAMES.values() else "1d")
+    price_types = normalize_price_types(list(price_types))
+
+    # Daten abrufen (nur fehlende Zeiträume werden nachgeladen)
+    if cache is None:
+        cache = OHLCVCache(cache_dir) if cache_dir else OHLCVCache()
+    with tracer.span("prices", tickers=len(tickers), interval=interval):
+        df = cache.get_stock_data(tickers, start_date, end_date, interval)
+    print(f"Cache: {cache.stats()}")
+
+    # Falls mehrere Ticker abgefragt wurden, besitzt der DataFrame eine
+    # MultiIndex-Spalte ohne Namen.  Wir benennen die Ebenen, damit die
+    # spaetere Auswahl nach Preistyp funktioniert.
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns.names = ["Ticker", "Price"]
+
+    if df.empty:
+        print("No data was retrieved. Please check your inputs and try again.")
+        return None
+
     # Zeitzoneninformationen entfernen
     df.index = df.index.tz_localize(None)
 
-    # Gewünschte Preistypen für die Excel-Datei auswählen
+    # Gewünschte Preistypen für die Ausgabedatei auswählen
     if df.columns.nlevels == 1:
         df_selected = df.loc[:, df.columns.isin(price_types)]
     else:
         df_selected = df.loc[:, df.columns.get_level_values("Price").isin(price_types)]
 
-    # Ausgabeordner erstellen
-    output_folder = r"E:\\code"
+    # Blockweise im gewählten Format speichern
     os.makedirs(output_folder, exist_ok=True)
+    with tracer.span("write_prices", format=output_format):
+        output_file, rows = write_prices(df_selected, tickers, price_types, output_format,
+                                         output_folder, output_name)
+    print(f"Data saved to {output_file} ({rows} rows)")
 
-    # In Excel speichern
-    output_file = os.path.join(output_folder, "Historical_ITPM_Prices.xlsx")
-    df_selected.to_excel(output_file)
-    print(f"Data saved to {output_file}")
-
-    # Volatilität berechnen und visualisieren
+    # Volatilität für alle Ticker in einem Durchgang berechnen
+    with tracer.span("compute_volatility", estimator=estimator):
+        price_df, volatility_df = compute_volatility(df, tickers, interval, estimator)
     for ticker in tickers:
-        # Preisdaten extrahieren
-        try:
-            if 'Adj Close' in df[ticker].columns:
-                price_data = df[ticker]['Adj Close']
-            elif 'Close' in df[ticker].columns:
-                price_data = df[ticker]['Close']
-            else:
-                print(f"Price data not found for {ticker}")
-                continue
-        except KeyError:
+        if ticker not in price_df.columns:
             print(f"Price data not found for {ticker}")
-            continue
 
-        # Renditen berechnen
-        returns = price_data.pct_change()
+    # Kurs und Volatilität parallel und headless plotten
+    timings = []
+    if plots:
+        from render import render_charts, print_timings
+        with tracer.span("render_charts", charts=len(price_df.columns)):
+            timings = render_charts(price_df, volatility_df, output_folder, workers=workers, sheet=sheet)
+        for _, plot_file, _ in timings:
+            print(f"Plot saved to {plot_file}")
+        print_timings(timings)
 
-        # Fenstergröße basierend auf dem Intervall definieren
-        if interval == '1d':
-            window = 20  # 20 Tage
-        elif interval == '1wk':
-            window = 4   # 4 Wochen
-        elif interval == '1mo':
-            window = 12  # 12 Monate
-        else:
-            window = 20  # Standardwert
+    return {
+        "output_file": output_file,
+        "rows": rows,
+        "prices": price_df,
+        "volatility": volatility_df,
+        "timings": timings,
+    }
 
-        # Rollierende Volatilität berechnen
-        volatility = returns.rolling(window=window).std() * np.sqrt(window)
 
-        # Kurs und Volatilität plotten
-        fig, ax1 = plt.subplots(figsize=(12,6))
+def prompt_job():
+    # Benutzereingaben (interaktiver Modus wie bisher)
+    job = dict(DEFAULTS)
+    job["start"] = input("Enter start date (DD.MM.YYYY): ")
+    job["end"] = input("Enter end date (DD.MM.YYYY): ")
+    job["timeframe"] = input("Enter timeframe (daily, weekly, monthly): ").lower()
+    job["tickers"] = input("Enter ticker symbols (space-separated): ").split()
+    job["price_types"] = input("Enter price types (Open High Low Close Adj Close): ").split()
+    job["estimator"] = input(f"Enter volatility estimator ({', '.join(ESTIMATORS)}) [close]: ").strip().lower() or "close"
+    job["output_folder"] = input(f"Enter output folder [{DEFAULT_OUTPUT_FOLDER}]: ").strip() or DEFAULT_OUTPUT_FOLDER
+    job["output_format"] = input(f"Enter output format ({', '.join(FORMATS)}) [parquet]: ").strip().lower() or "parquet"
+    job["sheet"] = input("Also render a small-multiples sheet? (y/N): ").strip().lower() in ("y", "yes", "j", "ja")
+    return job
 
-        color = 'tab:blue'
-        ax1.set_xlabel('Date')
-        ax1.set_ylabel('Price', color=color)
-        ax1.plot(price_data.index, price_data, color=color)
-        ax1.tick_params(axis='y', labelcolor=color)
 
-        ax2 = ax1.twinx()
-        color = 'tab:red'
-        ax2.set_ylabel('Volatility', color=color)
-        ax2.plot(volatility.index, volatility, color=color)
-        ax2.tick_params(axis='y', labelcolor=color)
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Download prices, export them and plot rolling volatility.")
+    parser.add_argument("--config", help="JSON file with default options (same keys as the long options)")
+    parser.add_argument("--batch", help="JSON file with a list of jobs; each job overrides the defaults")
+    parser.add_argument("--tickers", nargs="+", help="ticker symbols")
+    parser.add_argument("--start", help="start date (DD.MM.YYYY or YYYY-MM-DD)")
+    parser.add_argument("--end", help="end date (DD.MM.YYYY or YYYY-MM-DD)")
+    parser.add_argument("--timeframe", choices=list(TIMEFRAMES))
+    parser.add_argument("--price-types", dest="price_types", nargs="+",
+                        help="price types to export (Open High Low Close Adj Close)")
+    parser.add_argument("--estimator", choices=ESTIMATORS)
+    parser.add_argument("--output-folder", dest="output_folder")
+    parser.add_argument("--output-format", dest="output_format", choices=FORMATS)
+    parser.add_argument("--output-name", dest="output_name")
+    parser.add_argument("--no-plots", dest="plots", action="store_false", default=None)
+    parser.add_argument("--sheet", action="store_true", default=None, help="also render a small-multiples sheet")
+    parser.add_argument("--workers", type=int, help="render processes (default: number of CPUs)")
+    parser.add_argument("--cache-dir", dest="cache_dir")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write spans as JSON (OTLP for *.otlp.json) and print a timing summary")
+    return parser
+
+
+def jobs_from_args(args):
+    """Führt Standardwerte, Konfigurationsdatei, Kommandozeile und Batch-Jobs zusammen."""
+    base = dict(DEFAULTS)
+    if args.config:
+        base.update(load_json(args.config))
+    base.update({key: value for key, value in vars(args).items()
+                 if key in DEFAULTS and value is not None})
+
+    if not args.batch:
+        return [base]
+    batch = load_json(args.batch)
+    if isinstance(batch, dict):
+        batch = batch.get("jobs", [])
+    return [{**base, **job} for job in batch]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        jobs = [prompt_job()]
+    else:
+        args = build_parser().parse_args(argv)
+        if args.trace:
+            tracer.enable(args.trace)
+        jobs = jobs_from_args(args)
+
+    for job in jobs:
+        missing = [key for key in ("tickers", "start", "end") if not job.get(key)]
+        if missing:
+            raise SystemExit(f"Missing required option(s): {', '.join(missing)}")
 
-        plt.title(f'{ticker} Price and Volatility')
+    # Ein Cache für alle Jobs: warmer Index, ein Interpreter
+    from cache import OHLCVCache
+    caches = {}
+    results = []
+    for i, job in enumerate(jobs, 1):
+        if len(jobs) > 1:
+            print(f"\n=== Job {i}/{len(jobs)}: {' '.join(job['tickers'])} {job['start']}..{job['end']} ===")
+        cache_dir = job.pop("cache_dir", None)
+        if cache_dir not in caches:
+            caches[cache_dir] = OHLCVCache(cache_dir) if cache_dir else OHLCVCache()
+        results.append(run(cache=caches[cache_dir], **job))
+    return results
 
-        # Plot speichern
-        plot_file = os.path.join(output_folder, f"{ticker}_price_volatility.png")
-        plt.savefig(plot_file)
-        plt.close()
-        print(f"Plot saved to {plot_file}")
 
-else:
-    print("No data was retrieved. Please check your inputs and try again.")
+# Der Guard ist nötig, weil die Render-Prozesse (spawn unter Windows)
+# dieses Modul beim Start erneut importieren.
+if __name__ == "__main__":
+    main()
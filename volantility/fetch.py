@@ -0,0 +1,128 @@
+import os
+import sys
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import run_in_context, tracer
+
+# Standardwerte für den gebündelten Abruf
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def yfinance_downloader(tickers, start, end, interval):
+    """Lädt mehrere Ticker mit einem einzigen yf.download-Aufruf.
+
+    Liefert einen DataFrame mit MultiIndex-Spalten (Ticker, Price).
+    """
+    import yfinance as yf
+
+    data = yf.download(
+        tickers,
+        start=start,
+        end=end,
+        interval=interval,
+        group_by="ticker",
+        threads=False,  # Parallelität steuern wir selbst über die Chunks
+        progress=False,
+    )
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Ältere yfinance-Versionen liefern bei einem Ticker flache Spalten
+        data = pd.concat({tickers[0]: data}, axis=1)
+    return data
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def split_by_ticker(frame, tickers):
+    """Zerlegt einen Bulk-Download in Einzel-DataFrames pro Ticker.
+
+    Ticker ohne Spalten oder nur mit NaN-Werten gelten als fehlgeschlagen.
+    """
+    result, failed = {}, []
+    available = set(frame.columns.get_level_values(0)) if not frame.empty else set()
+    for ticker in tickers:
+        if ticker not in available:
+            failed.append(ticker)
+            continue
+        ticker_data = frame[ticker].dropna(how="all")
+        if ticker_data.empty:
+            failed.append(ticker)
+        else:
+            result[ticker] = ticker_data
+    return result, failed
+
+
+def fetch_chunk(chunk, start_date, end_date, interval, downloader):
+    """Ruft einen Chunk mit einer Bulk-Anfrage ab.
+
+    Schlägt die Bulk-Anfrage komplett fehl, wird jeder Ticker einzeln
+    versucht, damit ein fehlerhaftes Symbol nicht den ganzen Chunk kostet.
+    """
+    try:
+        with tracer.span("yfinance.download", tickers=len(chunk), interval=interval) as span:
+            frame = downloader(list(chunk), start_date, end_date, interval)
+            if span.recording:
+                span.set(rows=len(frame), bytes=int(frame.memory_usage(deep=False).sum()))
+    except Exception as e:
+        if len(chunk) == 1:
+            return {}, {chunk[0]: e}
+        print(f"Bulk download failed for {len(chunk)} tickers ({e}), retrying one by one")
+        result, errors = {}, {}
+        for ticker in chunk:
+            single, single_errors = fetch_chunk([ticker], start_date, end_date, interval, downloader)
+            result.update(single)
+            errors.update(single_errors)
+        return result, errors
+
+    result, failed = split_by_ticker(frame, chunk)
+    return result, {ticker: "no data returned" for ticker in failed}
+
+
+def fetch_stock_data(tickers, start_date, end_date, interval,
+                     chunk_size=DEFAULT_CHUNK_SIZE,
+                     max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                     downloader=None):
+    """Lädt alle Ticker gebündelt und parallel.
+
+    Gibt ein Dict {ticker: DataFrame} und ein Dict {ticker: Fehler} zurück.
+    `downloader` kann für Offline-Tests durch eine lokale Datenquelle mit
+    derselben Signatur wie `yfinance_downloader` ersetzt werden.
+    """
+    downloader = downloader or yfinance_downloader
+    tickers = list(dict.fromkeys(tickers))
+    chunks = list(chunked(tickers, max(1, chunk_size)))
+
+    data, errors = {}, {}
+    if not chunks:
+        return data, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as pool:
+        futures = [pool.submit(run_in_context(fetch_chunk), chunk, start_date, end_date, interval, downloader)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_data, chunk_errors = future.result()
+            data.update(chunk_data)
+            errors.update(chunk_errors)
+
+    # Eingabereihenfolge beibehalten
+    data = {ticker: data[ticker] for ticker in tickers if ticker in data}
+    return data, errors
+
+
+def get_stock_data(tickers, start_date, end_date, timeframe,
+                   chunk_size=DEFAULT_CHUNK_SIZE,
+                   max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                   downloader=None):
+    data, errors = fetch_stock_data(tickers, start_date, end_date, timeframe,
+                                    chunk_size=chunk_size,
+                                    max_concurrency=max_concurrency,
+                                    downloader=downloader)
+    for ticker, error in errors.items():
+        print(f"Error for {ticker}: {error}")
+    # Ein einziges concat am Ende statt wiederholter Reallokation
+    return pd.concat(data, axis=1) if data else pd.DataFrame()
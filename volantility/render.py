@@ -0,0 +1,143 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Unterhalb dieser Anzahl lohnt sich der Start eines Prozesspools nicht
+MIN_PARALLEL_CHARTS = 8
+
+# Vorlage pro Prozess: wird einmal gebaut und für jeden Ticker wiederverwendet
+_template = None
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")  # headless, kein GUI-Backend laden
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def build_template(figsize=(12, 6)):
+    plt = _pyplot()
+    fig, ax1 = plt.subplots(figsize=figsize)
+
+    color = 'tab:blue'
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('Price', color=color)
+    price_line, = ax1.plot([], [], color=color)
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.xaxis_date()
+
+    ax2 = ax1.twinx()
+    color = 'tab:red'
+    ax2.set_ylabel('Volatility', color=color)
+    volatility_line, = ax2.plot([], [], color=color)
+    ax2.tick_params(axis='y', labelcolor=color)
+
+    return {"fig": fig, "axes": (ax1, ax2), "lines": (price_line, volatility_line)}
+
+
+def _init_worker():
+    global _template
+    _template = build_template()
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def render_chart(job):
+    """Aktualisiert die Liniendaten der Vorlage und speichert das PNG.
+
+    job = (ticker, x, price, volatility, plot_file), x als Matplotlib-Datumswerte.
+    Gibt (ticker, plot_file, Sekunden) zurück.
+    """
+    global _template
+    if _template is None:
+        _template = build_template()
+
+    ticker, x, price, volatility, plot_file = job
+    started = time.perf_counter()
+
+    ax1, ax2 = _template["axes"]
+    price_line, volatility_line = _template["lines"]
+    price_line.set_data(x, price)
+    volatility_line.set_data(x, volatility)
+    for ax in (ax1, ax2):
+        ax.relim()
+        ax.autoscale_view()
+    ax1.set_title(f'{ticker} Price and Volatility')
+
+    _template["fig"].savefig(plot_file)
+    return ticker, plot_file, time.perf_counter() - started
+
+
+def render_sheet(price_df, volatility_df, plot_file, ncols=4, panel_size=(4, 2.5)):
+    """Small-Multiples-Übersicht aller Ticker auf einem Blatt."""
+    plt = _pyplot()
+    started = time.perf_counter()
+
+    tickers = list(price_df.columns)
+    nrows = max(1, int(np.ceil(len(tickers) / ncols)))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(panel_size[0] * ncols, panel_size[1] * nrows),
+                             sharex=True, squeeze=False)
+    for ax, ticker in zip(axes.flat, tickers):
+        ax.plot(price_df.index, price_df[ticker], color='tab:blue', linewidth=0.8)
+        ax.tick_params(axis='y', labelcolor='tab:blue', labelsize=6)
+        ax.tick_params(axis='x', labelsize=6)
+        twin = ax.twinx()
+        twin.plot(volatility_df.index, volatility_df[ticker], color='tab:red', linewidth=0.8)
+        twin.tick_params(axis='y', labelcolor='tab:red', labelsize=6)
+        ax.set_title(ticker, fontsize=8)
+    for ax in list(axes.flat)[len(tickers):]:
+        ax.axis('off')
+
+    fig.tight_layout()
+    fig.savefig(plot_file)
+    plt.close(fig)
+    return "sheet", plot_file, time.perf_counter() - started
+
+
+def render_charts(price_df, volatility_df, output_folder, workers=None, sheet=False):
+    """Rendert alle Kurs-/Volatilitätscharts, bei Bedarf auf einem Prozesspool.
+
+    Gibt eine Liste von (ticker, plot_file, Sekunden) zurück.
+    """
+    from matplotlib.dates import date2num
+
+    index = price_df.index
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    x = date2num(index.to_numpy())
+
+    jobs = [
+        (ticker, x, price_df[ticker].to_numpy(), volatility_df[ticker].to_numpy(),
+         os.path.join(output_folder, f"{ticker}_price_volatility.png"))
+        for ticker in price_df.columns
+    ]
+
+    workers = min(workers or available_cpus(), len(jobs))
+    if workers <= 1 or len(jobs) < MIN_PARALLEL_CHARTS:
+        timings = [render_chart(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            timings = list(pool.map(render_chart, jobs, chunksize=chunksize))
+
+    if sheet and jobs:
+        timings.append(render_sheet(price_df, volatility_df,
+                                    os.path.join(output_folder, "price_volatility_sheet.png")))
+    return timings
+
+
+def print_timings(timings, top=5):
+    if not timings:
+        return
+    seconds = [t for _, _, t in timings]
+    print(f"Rendered {len(timings)} charts: total {sum(seconds):.2f}s, "
+          f"mean {np.mean(seconds) * 1000:.0f}ms, max {max(seconds) * 1000:.0f}ms")
+    for ticker, plot_file, t in sorted(timings, key=lambda item: item[2], reverse=True)[:top]:
+        print(f"  {t * 1000:7.0f}ms  {ticker}  {plot_file}")
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+# Fenstergröße je Intervall (20 Tage, 4 Wochen, 12 Monate)
+WINDOWS = {"1d": 20, "1wk": 4, "1mo": 12}
+DEFAULT_WINDOW = 20
+
+
+def window_for_interval(interval):
+    return WINDOWS.get(interval, DEFAULT_WINDOW)
+
+
+# --- Matrizen aus dem Download-DataFrame ---------------------------------
+
+def field_matrix(df, tickers, field):
+    """Baut eine (Datum x Ticker)-Matrix für ein Preisfeld, fehlende Ticker = NaN."""
+    matrix = np.full((len(df.index), len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        try:
+            matrix[:, j] = df[ticker][field].to_numpy(dtype=float)
+        except KeyError:
+            pass
+    return matrix
+
+
+def price_matrix(df, tickers):
+    """Adj Close, falls vorhanden, sonst Close – wie bisher pro Ticker.
+
+    Gibt die Matrix und eine Maske der Ticker mit Preisdaten zurück.
+    """
+    matrix = np.full((len(df.index), len(tickers)), np.nan)
+    found = np.zeros(len(tickers), dtype=bool)
+    for j, ticker in enumerate(tickers):
+        try:
+            columns = df[ticker].columns
+        except KeyError:
+            continue
+        for field in ("Adj Close", "Close"):
+            if field in columns:
+                matrix[:, j] = df[ticker][field].to_numpy(dtype=float)
+                found[j] = True
+                break
+    return matrix, found
+
+
+def ohlc_matrices(df, tickers):
+    return tuple(field_matrix(df, tickers, field) for field in ("Open", "High", "Low", "Close"))
+
+
+# --- Bausteine -----------------------------------------------------------
+
+def forward_fill(x):
+    """Spaltenweises ffill; führende NaN bleiben erhalten."""
+    valid = ~np.isnan(x)
+    idx = np.where(valid, np.arange(x.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return x[idx, np.arange(x.shape[1])]
+
+
+def simple_returns(prices, fill_method=None):
+    """Entspricht DataFrame.pct_change(); fill_method="pad" füllt Lücken vorher auf."""
+    if fill_method == "pad":
+        prices = forward_fill(prices)
+    returns = np.full(prices.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = prices[1:] / prices[:-1] - 1.0
+    return returns
+
+
+def log_ratio(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(a / b)
+
+
+def _window_sums(x, window):
+    """Laufende Fenstersummen über kumulierte Summen (O(1) pro Schritt).
+
+    Die Spalten werden vorher zentriert, um Auslöschung bei großen
+    Kumulativsummen zu vermeiden. Liefert (Summe, Quadratsumme, Anzahl,
+    Spaltenmittel) für jedes vollständige Fenster.
+    """
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    xc = np.where(valid, x, 0.0)
+    center = xc.sum(axis=0) / np.maximum(count, 1)
+    xc -= center
+    xc[~valid] = 0.0
+
+    rows = x.shape[0] + 1
+    c1 = np.zeros((rows, x.shape[1]))
+    c2 = np.zeros((rows, x.shape[1]))
+    cn = np.zeros((rows, x.shape[1]))
+    np.cumsum(xc, axis=0, out=c1[1:])
+    np.multiply(xc, xc, out=xc)
+    np.cumsum(xc, axis=0, out=c2[1:])
+    np.cumsum(valid, axis=0, out=cn[1:])
+
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+    n = cn[window:] - cn[:-window]
+    return s1, s2, n, center
+
+
+def rolling_mean(x, window):
+    """Wie rolling(window).mean(): NaN, sobald ein Wert im Fenster fehlt."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < window:
+        return out
+    s1, _, n, center = _window_sums(x, window)
+    s1 /= window
+    s1 += center
+    s1[n != window] = np.nan
+    out[window - 1:] = s1
+    return out
+
+
+def rolling_var(x, window, ddof=1):
+    """Wie rolling(window).var(ddof): NaN, sobald ein Wert im Fenster fehlt."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < window or window <= ddof:
+        return out
+    s1, s2, n, _ = _window_sums(x, window)
+    s1 *= s1
+    s1 /= window
+    s2 -= s1
+    s2 /= window - ddof
+    np.maximum(s2, 0.0, out=s2)
+    s2[n != window] = np.nan
+    out[window - 1:] = s2
+    return out
+
+
+# --- Schätzer ------------------------------------------------------------
+# Alle Schätzer liefern die Volatilität pro Periode, skaliert mit `scale`
+# (Standard: sqrt(window), wie im bisherigen Skript).
+
+def close_to_close(prices, window, scale=None, fill_method=None):
+    returns = simple_returns(prices, fill_method=fill_method)
+    scale = np.sqrt(window) if scale is None else scale
+    return np.sqrt(rolling_var(returns, window)) * scale
+
+
+def ewma(prices, window, lam=0.94, scale=None, fill_method=None):
+    """RiskMetrics-EWMA: var_t = lam * var_{t-1} + (1 - lam) * r_t^2.
+
+    Fehlende Renditen lassen die Varianz der jeweiligen Spalte unverändert.
+    """
+    returns = simple_returns(prices, fill_method=fill_method)
+    scale = np.sqrt(window) if scale is None else scale
+    out = np.full(returns.shape, np.nan)
+    var = np.full(returns.shape[1], np.nan)
+    for t in range(returns.shape[0]):
+        r = returns[t]
+        valid = ~np.isnan(r)
+        started = valid & ~np.isnan(var)
+        var = np.where(started, lam * var + (1.0 - lam) * r * r, var)
+        var = np.where(valid & np.isnan(var), r * r, var)
+        out[t] = var
+    return np.sqrt(out) * scale
+
+
+def parkinson(high, low, window, scale=None):
+    scale = np.sqrt(window) if scale is None else scale
+    hl = log_ratio(high, low) ** 2
+    return np.sqrt(rolling_mean(hl, window) / (4.0 * np.log(2.0))) * scale
+
+
+def garman_klass(open_, high, low, close, window, scale=None):
+    scale = np.sqrt(window) if scale is None else scale
+    hl = log_ratio(high, low) ** 2
+    co = log_ratio(close, open_) ** 2
+    var = rolling_mean(0.5 * hl - (2.0 * np.log(2.0) - 1.0) * co, window)
+    return np.sqrt(np.maximum(var, 0.0)) * scale
+
+
+def yang_zhang(open_, high, low, close, window, scale=None):
+    scale = np.sqrt(window) if scale is None else scale
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[1:] = close[:-1]
+    overnight = log_ratio(open_, prev_close)
+    open_close = log_ratio(close, open_)
+    rogers_satchell = (log_ratio(high, close) * log_ratio(high, open_)
+                       + log_ratio(low, close) * log_ratio(low, open_))
+    k = 0.34 / (1.34 + (window + 1) / (window - 1))
+    var = (rolling_var(overnight, window)
+           + k * rolling_var(open_close, window)
+           + (1.0 - k) * rolling_mean(rogers_satchell, window))
+    return np.sqrt(np.maximum(var, 0.0)) * scale
+
+
+ESTIMATORS = ("close", "ewma", "parkinson", "garman_klass", "yang_zhang")
+
+
+def compute_volatility(df, tickers, interval, estimator="close"):
+    """Berechnet die Volatilität aller Ticker in einem Durchgang.
+
+    Gibt (Preis-DataFrame, Volatilitäts-DataFrame) mit Ticker-Spalten zurück;
+    Ticker ohne Preisdaten fehlen in beiden.
+    """
+    window = window_for_interval(interval)
+    prices, found = price_matrix(df, tickers)
+
+    if estimator == "close":
+        vol = close_to_close(prices, window)
+    elif estimator == "ewma":
+        vol = ewma(prices, window)
+    elif estimator in ("parkinson", "garman_klass", "yang_zhang"):
+        open_, high, low, close = ohlc_matrices(df, tickers)
+        if estimator == "parkinson":
+            vol = parkinson(high, low, window)
+        elif estimator == "garman_klass":
+            vol = garman_klass(open_, high, low, close, window)
+        else:
+            vol = yang_zhang(open_, high, low, close, window)
+    else:
+        raise ValueError(f"Unknown estimator: {estimator}")
+
+    columns = [ticker for ticker, ok in zip(tickers, found) if ok]
+    price_df = pd.DataFrame(prices[:, found], index=df.index, columns=columns)
+    vol_df = pd.DataFrame(vol[:, found], index=df.index, columns=columns)
+    return price_df, vol_df
@@ -0,0 +1,160 @@
+import os
+import gzip
+
+# Anzahl Ticker pro geschriebenem Block (Row Group)
+DEFAULT_BATCH_SIZE = 50
+
+
+def to_long(batch, columns):
+    """Wandelt einen (Ticker, Price)-DataFrame in das Langformat um.
+
+    Ergebnis: Spalten Date, Ticker und die gewünschten Preistypen; fehlende
+    Preistypen werden als NaN ergänzt, damit alle Blöcke dasselbe Schema haben.
+    """
+    long = batch.stack(level="Ticker", future_stack=True)
+    long = long.reindex(columns=columns).dropna(how="all")
+    long.index.names = ["Date", "Ticker"]
+    long = long.reset_index()
+    long.columns.name = None
+    long[columns] = long[columns].astype("float64")
+    return long
+
+
+class OutputWriter:
+    extension = ""
+
+    def __init__(self, path, columns):
+        self.path = path
+        # Doppelte Preistypen würden beim Umwandeln ins Langformat doppelte Spalten erzeugen
+        self.columns = list(dict.fromkeys(columns))
+        self.rows = 0
+
+    def write_batch(self, batch):
+        long = to_long(batch, self.columns)
+        if not long.empty:
+            self._write(long)
+            self.rows += len(long)
+
+    def _write(self, long):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetWriter(OutputWriter):
+    """Schreibt jeden Block als eigene Row Group."""
+    extension = ".parquet"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._writer = None
+
+    def _write(self, long):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(long, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class FeatherWriter(OutputWriter):
+    """Feather v2 (Arrow IPC), ein Record Batch pro Block."""
+    extension = ".feather"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._sink = None
+        self._writer = None
+
+    def _write(self, long):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(long, preserve_index=False)
+        if self._writer is None:
+            self._sink = pa.OSFile(self.path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+
+
+class CsvGzipWriter(OutputWriter):
+    extension = ".csv.gz"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._file = None
+
+    def _write(self, long):
+        header = self._file is None
+        if header:
+            self._file = gzip.open(self.path, "wt", encoding="utf-8", newline="")
+        long.to_csv(self._file, header=header, index=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ExcelWriter(OutputWriter):
+    """Excel im Write-only-Modus von openpyxl: Zeilen werden direkt
+    weggeschrieben, statt die ganze Arbeitsmappe im Speicher aufzubauen."""
+    extension = ".xlsx"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Prices")
+        self._sheet.append(["Date", "Ticker"] + self.columns)
+
+    def _write(self, long):
+        long = long.astype(object).where(long.notna(), None)
+        for row in long.itertuples(index=False):
+            self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+WRITERS = {
+    "parquet": ParquetWriter,
+    "feather": FeatherWriter,
+    "csv.gz": CsvGzipWriter,
+    "xlsx": ExcelWriter,
+}
+
+
+def open_writer(fmt, output_folder, name, columns):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format: {fmt} (choose from {', '.join(WRITERS)})")
+    writer_class = WRITERS[fmt]
+    os.makedirs(output_folder, exist_ok=True)
+    return writer_class(os.path.join(output_folder, name + writer_class.extension), columns)
+
+
+def write_prices(df_selected, tickers, columns, fmt, output_folder, name,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """Schreibt die Kurse blockweise (je batch_size Ticker) in die Ausgabedatei."""
+    available = [t for t in tickers if t in df_selected.columns.get_level_values("Ticker")]
+    with open_writer(fmt, output_folder, name, columns) as writer:
+        for i in range(0, len(available), batch_size):
+            writer.write_batch(df_selected[available[i:i + batch_size]])
+    return writer.path, writer.rows